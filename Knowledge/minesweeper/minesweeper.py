@@ -1,5 +1,19 @@
+import functools
 import itertools
+import math
+import numpy as np
 import random
+import sys
+import time
+
+# Seconds allowed for enumerating mine assignments before approximating
+TIME_BUDGET = 1.0
+
+# Largest frontier component whose assignments are enumerated exactly
+MAX_COMPONENT_CELLS = 100
+
+# Ways for MinesweeperAI to draw conclusions from its knowledge base
+SOLVERS = ["subset", "gauss"]
 
 
 class Minesweeper():
@@ -9,26 +23,24 @@ class Minesweeper():
 
     def __init__(self, height=8, width=8, mines=8):
 
-        # Set initial width, height, and number of mines
+        # Set initial width and height
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, sampling cells without replacement
+        indices = random.sample(range(height * width), mines)
+        self.mines = set(divmod(index, width) for index in indices)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[indices] = True
+
+        # Count the mines around every cell at once, by adding up the
+        # board shifted to each of the 8 neighbouring positions
+        padded = np.pad(self.board, 1).astype(np.int8)
+        self.counts = np.zeros((height, width), dtype=np.int8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -41,7 +53,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i, j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +62,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +70,34 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return int(self.counts[i, j])
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell, revealed=()):
+        """
+        Returns the list of cells uncovered by clicking on a safe `cell`:
+        the cell itself and, if it has no nearby mines, every cell
+        reachable through neighbouring cells with no nearby mines,
+        along with their border. Cells in `revealed` are skipped.
+        """
+        seen = {cell}
+        queue = [cell]
+        cells = []
+        while queue:
+            i, j = queue.pop()
+            if (i, j) not in revealed:
+                cells.append((i, j))
+            if self.counts[i, j] != 0:
+                continue
+
+            # No nearby mines, so every neighbour is safe to uncover
+            for row in range(max(i - 1, 0), min(i + 2, self.height)):
+                for column in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (row, column) not in seen and (row, column) not in revealed:
+                        seen.add((row, column))
+                        queue.append((row, column))
+
+        return cells
 
     def won(self):
         """
@@ -101,6 +123,12 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable value identifying the sentence.
+        """
+        return (frozenset(self.cells), self.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -143,11 +171,18 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, solver="subset"):
 
-        # Set initial height and width
+        # Set initial height, width, and number of mines
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # With "gauss", sentences are also combined by Gaussian
+        # elimination whenever subset inference finds no safe move
+        if solver not in SOLVERS:
+            raise ValueError(f"unknown solver {solver}")
+        self.solver = solver
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -156,26 +191,156 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
+        # Safe cells, some of which may have been clicked on since
+        self.safe_moves = []
+
+        # Indices of cells neither clicked on nor known to be mines, and
+        # the position of each index in that list (-1 once removed)
+        self.unexplored = list(range(height * width))
+        self.unexplored_positions = list(range(height * width))
+
+        # List of sentences about the game known to be true. Sentences
+        # refer to cell (i, j) by its index i * width + j
         self.knowledge = []
 
+        # Sentences in the knowledge base, keyed by their cells and count
+        self.sentence_keys = dict()
+
+        # Map each cell index to the sentences mentioning it, keyed by id
+        self.cell_sentences = dict()
+
+        # Number of sentences emptied out but still in the knowledge base
+        self.forgotten = 0
+
+        # Seconds spent on inference for each move
+        self.inference_times = []
+
+        # Cells found to be safe or mines by Gaussian elimination
+        self.eliminated = 0
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+
+        Returns the list of sentences that were changed
+        and still carry information.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        index = self.index(cell)
+        self.explore(index)
+        changed = []
+        for sentence in self.cell_sentences.pop(index, {}).values():
+            if self.update_sentence(sentence, sentence.mark_mine, index):
+                changed.append(sentence)
+        return changed
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+
+        Returns the list of sentences that were changed
+        and still carry information.
+        """
+        if cell not in self.safes:
+            self.safes.add(cell)
+            self.safe_moves.append(cell)
+        index = self.index(cell)
+        changed = []
+        for sentence in self.cell_sentences.pop(index, {}).values():
+            if self.update_sentence(sentence, sentence.mark_safe, index):
+                changed.append(sentence)
+        return changed
+
+    def index(self, cell):
+        """
+        Returns the index of `cell` used by the knowledge base.
+        """
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, index):
+        """
+        Returns the (i, j) cell with the given `index`.
+        """
+        return divmod(index, self.width)
+
+    def explore(self, index):
+        """
+        Removes the cell with the given `index` from `self.unexplored`.
+        """
+        position = self.unexplored_positions[index]
+        if position < 0:
+            return
+        last = self.unexplored.pop()
+        if last != index:
+            self.unexplored[position] = last
+            self.unexplored_positions[last] = position
+        self.unexplored_positions[index] = -1
+
+    def register_sentence(self, sentence):
+        """
+        Records `sentence` in `self.sentence_keys`.
+
+        Empty sentences and duplicates of a sentence already known
+        carry no new information: nothing is recorded for them
+        and False is returned.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        key = sentence.key()
+        if len(sentence.cells) == 0 or key in self.sentence_keys:
+            return False
+        self.sentence_keys[key] = sentence
+        return True
+
+    def forget_sentence(self, sentence):
+        """
+        Removes `sentence` from the cell index and empties it out,
+        so it gets dropped from the knowledge base.
+        """
+        for cell in sentence.cells:
+            sentences = self.cell_sentences[cell]
+            del sentences[id(sentence)]
+            if len(sentences) == 0:
+                del self.cell_sentences[cell]
+        sentence.cells = set()
+        self.forgotten += 1
+
+    def update_sentence(self, sentence, update, cell):
+        """
+        Applies `update` (a sentence's `mark_mine` or `mark_safe`) to
+        `cell`, keeping `self.sentence_keys` in step with the change.
+        The caller has already dropped `cell` from the cell index.
+
+        Returns True if the updated sentence still carries information.
+        """
+        del self.sentence_keys[sentence.key()]
+        update(cell)
+        if self.register_sentence(sentence):
+            return True
+        self.forget_sentence(sentence)
+        return False
+
+    def add_sentence(self, sentence, queue):
+        """
+        Adds `sentence` to the knowledge base, the cell index and the
+        inference `queue`, unless it is empty or already known.
+        """
+        if self.register_sentence(sentence):
+            self.knowledge.append(sentence)
+            for cell in sentence.cells:
+                self.cell_sentences.setdefault(cell, dict())[id(sentence)] = sentence
+            queue.append(sentence)
+
+    def related_sentences(self, sentence):
+        """
+        Returns the sentences sharing at least one cell with `sentence`,
+        not including `sentence` itself.
+        """
+        related = dict()
+        for cell in sentence.cells:
+            related.update(self.cell_sentences[cell])
+        related.pop(id(sentence), None)
+        return list(related.values())
 
     def add_knowledge(self, cell, count):
         """
@@ -191,48 +356,97 @@ class MinesweeperAI():
                if it can be concluded based on the AI's knowledge base
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
+
+        Steps 4) and 5) are repeated until a fixpoint is reached. Only
+        sentences that were added or changed during this move are
+        re-examined. The time spent is appended to `self.inference_times`.
         """
+        start = time.perf_counter()
+
         # 1) and 2)
         self.moves_made.add(cell)
-        self.mark_safe(cell)
+        self.explore(self.index(cell))
+        queue = self.mark_safe(cell)
 
-        # 3)
+        # 3) Rows are bounded by the height, columns by the width
         cells = set()
         new_count = count
-        x_nearby = [cell[0] - 1, cell[0], cell[0] + 1]
-        y_nearby = [cell[1] - 1, cell[1], cell[1] + 1]
-        for i in range(3):
-            for j in range(3):
-                if (x_nearby[i] < self.width) and (y_nearby[j] < self.height) and (x_nearby[i] >= 0) and (y_nearby[j] >= 0):
-                    if ((x_nearby[i], y_nearby[j]) not in self.moves_made) and ((x_nearby[i], y_nearby[j]) not in self.safes) and ((x_nearby[i], y_nearby[j]) not in self.mines):
-                        cells.add((x_nearby[i], y_nearby[j]))
-                    elif (x_nearby[i], y_nearby[j]) in self.mines:
-                        new_count = new_count - 1
-        new_knowledge = Sentence(cells, new_count)
-        self.knowledge.append(new_knowledge)
-
-        # 4)
-        knowledge_copy1 = self.knowledge.copy()
-        for sentence in knowledge_copy1:
-            safes = sentence.known_safes().copy()
-            mines = sentence.known_mines().copy()
-            for sa in safes:
-                self.mark_safe(sa)
+        i, j = cell
+        for row in range(max(i - 1, 0), min(i + 2, self.height)):
+            for column in range(max(j - 1, 0), min(j + 2, self.width)):
+                if (row, column) in self.mines:
+                    new_count = new_count - 1
+                elif (row, column) not in self.safes:
+                    cells.add(row * self.width + column)
+        self.add_sentence(Sentence(cells, new_count), queue)
+        self.infer(queue)
+
+        # Combine overlapping sentences when subsets alone are stuck
+        while self.solver == "gauss" and self.make_safe_move() is None:
+            mines, safes = self.eliminate()
+            if len(mines) == 0 and len(safes) == 0:
+                break
+            self.eliminated += len(mines) + len(safes)
+            queue = []
             for mi in mines:
-                self.mark_mine(mi)
-                
-        # Remove the sentences that we can already conclude all cells are either safes or mines
-        knowledge_copy2 = self.knowledge.copy()
-        for sentence in knowledge_copy2:
+                queue.extend(self.mark_mine(self.cell(mi)))
+            for sa in safes:
+                queue.extend(self.mark_safe(self.cell(sa)))
+            self.infer(queue)
+
+        # Remove the sentences that no longer tell us anything,
+        # once they make up half of the knowledge base
+        if 2 * self.forgotten > len(self.knowledge):
+            self.knowledge = [
+                sentence for sentence in self.knowledge
+                if len(sentence.cells) > 0
+            ]
+            self.forgotten = 0
+
+        self.inference_times.append(time.perf_counter() - start)
+
+    def infer(self, queue):
+        """
+        Draws every conclusion that follows from the sentences in `queue`
+        (steps 4 and 5 of `add_knowledge`), queueing the sentences that
+        are added or changed along the way until none are left.
+        """
+        while queue:
+            sentence = queue.pop()
+
+            # 4)
+            for mi in sentence.known_mines().copy():
+                queue.extend(self.mark_mine(self.cell(mi)))
+            for sa in sentence.known_safes().copy():
+                queue.extend(self.mark_safe(self.cell(sa)))
+
+            # Sentence was resolved or turned into a duplicate
             if len(sentence.cells) == 0:
-                self.knowledge.remove(sentence)
-        
-        # 5)
-        knowledge_copy3 = self.knowledge.copy()
-        for sentence1 in knowledge_copy3:
-            for sentence2 in knowledge_copy3:
-                if sentence2.cells.issubset(sentence1.cells) and (len(sentence2.cells) < len(sentence1.cells)):
-                    self.knowledge.append(Sentence(sentence1.cells - sentence2.cells, sentence1.count - sentence2.count))
+                continue
+
+            # 5)
+            for other in self.related_sentences(sentence):
+                if len(other.cells) == 0:
+                    continue
+                if other.cells < sentence.cells:
+                    self.add_sentence(Sentence(sentence.cells - other.cells, sentence.count - other.count), queue)
+                elif sentence.cells < other.cells:
+                    self.add_sentence(Sentence(other.cells - sentence.cells, other.count - sentence.count), queue)
+
+    def eliminate(self):
+        """
+        Returns a pair (mines, safes) of sets of cell indices deduced by
+        Gaussian elimination over each frontier component no larger than
+        MAX_COMPONENT_CELLS.
+        """
+        mines = set()
+        safes = set()
+        for cells, sentences in self.frontier_components():
+            if len(cells) <= MAX_COMPONENT_CELLS:
+                component_mines, component_safes = eliminate_component(cells, sentences)
+                mines.update(component_mines)
+                safes.update(component_safes)
+        return mines, safes
 
     def make_safe_move(self):
         """
@@ -243,12 +457,13 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        if len(self.safes) == 0:
-            return None
+        # Forget safe cells that have been clicked on since
+        while len(self.safe_moves) > 0 and self.safe_moves[-1] in self.moves_made:
+            self.safe_moves.pop()
 
-        for s in self.safes:
-            if s not in self.moves_made:
-                return s
+        if len(self.safe_moves) == 0:
+            return None
+        return self.safe_moves[-1]
 
     def make_random_move(self):
         """
@@ -257,9 +472,390 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        while len(self.moves_made) < 56:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            if ((x, y) not in self.moves_made) and ((x, y) not in self.mines):
-                return (x,y)
+        if len(self.unexplored) == 0:
+            return None
+        return self.cell(random.choice(self.unexplored))
+
+    def make_probabilistic_move(self, time_budget=TIME_BUDGET):
+        """
+        Returns the move least likely to be a mine among cells that
+        have not already been chosen and are not known to be mines,
+        or None if there is no such cell or all of them must be mines.
+
+        See `mine_probabilities` for how risk is computed.
+        """
+        probabilities, other = self.frontier_probabilities(time_budget)
+
+        move = None
+        risk = 1
+        if len(probabilities) > 0:
+            move = min(probabilities, key=probabilities.get)
+            risk = probabilities[move]
+        if other is not None and (move is None or other < risk):
+            move = self.random_other_cell()
+            risk = other
+
+        # Every cell left is certain to be a mine
+        if move is None or math.isclose(risk, 1):
+            return None
+        return self.cell(move)
+
+    def mine_probabilities(self, time_budget=TIME_BUDGET):
+        """
+        Returns a dictionary mapping every cell that has not been chosen
+        and is not known to be a mine to its probability of being a mine.
+
+        Frontier cells (those mentioned by some sentence) are split into
+        independent components. Every assignment of mines consistent with
+        a component's sentences is enumerated, and assignments are weighted
+        by the number of ways to place the remaining mines on the cells
+        outside the frontier. If enumeration takes longer than
+        `time_budget` seconds, or a component is too large, an
+        approximation based on each sentence's mine density is used.
+        """
+        probabilities, other = self.frontier_probabilities(time_budget)
+        result = dict()
+        for index in self.unexplored:
+            cell = self.cell(index)
+            if cell in self.safes:
+                result[cell] = 0
+            elif index in probabilities:
+                result[cell] = probabilities[index]
+            else:
+                result[cell] = other
+        return result
+
+    def frontier_probabilities(self, time_budget):
+        """
+        Returns a pair (probabilities, other): a dictionary mapping the
+        index of each frontier cell to its probability of being a mine,
+        and the probability shared by all other unexplored cells not known
+        to be safe (None if there are no such cells).
+        """
+        deadline = time.perf_counter() + time_budget
+
+        # Every move made was marked safe, and frontier cells are unknown
+        others = (len(self.unexplored) - len(self.safes)
+                  + len(self.moves_made) - len(self.cell_sentences))
+        remaining = self.total_mines - len(self.mines)
+
+        # Enumerate each component of the frontier
+        components = self.frontier_components()
+        distributions = []
+        for cells, sentences in components:
+            distribution = None
+            if len(cells) <= MAX_COMPONENT_CELLS:
+                distribution = enumerate_component(cells, sentences, deadline)
+            if distribution is None:
+                return self.approximate_probabilities(others, remaining)
+            distributions.append(distribution)
+
+        # Weight of a number of mines on the frontier, on a log scale
+        def log_weight(k):
+            if not 0 <= remaining - k <= others:
+                return None
+            return (math.lgamma(others + 1)
+                    - math.lgamma(remaining - k + 1)
+                    - math.lgamma(others - remaining + k + 1))
+
+        totals = convolve([
+            {k: solutions for k, (solutions, _) in distribution.items()}
+            for distribution in distributions
+        ])
+        log_weights = {k: log_weight(k) for k in totals}
+        if all(w is None for w in log_weights.values()):
+            return self.approximate_probabilities(others, remaining)
+        top = max(w for w in log_weights.values() if w is not None)
+        weights = {
+            k: (0 if w is None else math.exp(w - top))
+            for k, w in log_weights.items()
+        }
+        norm = sum(totals[k] * weights[k] for k in totals)
+
+        # Frontier cells, combining each component with all the others
+        probabilities = dict()
+        for c, (cells, _) in enumerate(components):
+            rest = convolve([
+                {k: solutions for k, (solutions, _) in distribution.items()}
+                for d, distribution in enumerate(distributions) if d != c
+            ])
+            for cell in cells:
+                probabilities[cell] = 0
+            for k, (_, mine_counts) in distributions[c].items():
+                weight = sum(
+                    solutions * weights[k + j]
+                    for j, solutions in rest.items()
+                )
+                for cell, count in zip(cells, mine_counts):
+                    probabilities[cell] += count * weight / norm
+
+        # Cells outside the frontier share the remaining mines evenly
+        other = None
+        if others > 0:
+            other = sum(
+                totals[k] * weights[k] * (remaining - k)
+                for k in totals
+            ) / (norm * others)
+
+        return probabilities, other
+
+    def approximate_probabilities(self, others, remaining):
+        """
+        Approximates `frontier_probabilities` without enumeration: a
+        frontier cell gets the highest mine density of the sentences
+        mentioning it, and other cells share the mines not expected
+        on the frontier.
+        """
+        probabilities = dict()
+        expected = 0
+        for cell, sentences in self.cell_sentences.items():
+            probabilities[cell] = max(
+                sentence.count / len(sentence.cells)
+                for sentence in sentences.values()
+            )
+            expected += probabilities[cell]
+
+        other = None
+        if others > 0:
+            other = min(max((remaining - expected) / others, 0), 1)
+
+        return probabilities, other
+
+    def random_other_cell(self):
+        """
+        Returns the index of an unexplored cell that is neither known
+        to be safe nor on the frontier, trying the corners first.
+        """
+        def is_other(index):
+            return (self.unexplored_positions[index] >= 0
+                    and index not in self.cell_sentences
+                    and self.cell(index) not in self.safes)
+
+        # Corners are the likeliest cells to have no nearby mines
+        corners = [
+            self.index((i, j))
+            for i in (0, self.height - 1)
+            for j in (0, self.width - 1)
+        ]
+        for index in corners:
+            if is_other(index):
+                return index
+
+        # Most unexplored cells are usually away from the frontier
+        for _ in range(100):
+            index = random.choice(self.unexplored)
+            if is_other(index):
+                return index
+        return random.choice([
+            index for index in self.unexplored if is_other(index)
+        ])
+
+    def frontier_components(self):
+        """
+        Splits the sentences of the knowledge base into groups that share
+        no cells. Returns a list of (cells, sentences) pairs, where cells
+        is a list ordered so that neighbouring cells are close together.
+        """
+        components = []
+        visited = set()
+        for start in self.cell_sentences:
+            if start in visited:
+                continue
+            visited.add(start)
+            cells = []
+            sentences = dict()
+            queue = [start]
+            while queue:
+                cell = queue.pop(0)
+                cells.append(cell)
+                for key, sentence in self.cell_sentences[cell].items():
+                    if key in sentences:
+                        continue
+                    sentences[key] = sentence
+                    for other in sentence.cells:
+                        if other not in visited:
+                            visited.add(other)
+                            queue.append(other)
+            components.append((cells, list(sentences.values())))
+        return components
+
+
+def enumerate_component(cells, sentences, deadline):
+    """
+    Enumerates every assignment of mines to `cells` that satisfies all
+    `sentences`, giving up (and returning None) once `deadline` passes.
+
+    Returns a dictionary mapping a number of mines k to a pair
+    (solutions, mine_counts): the number of consistent assignments with
+    k mines, and for each cell, how many of them put a mine on it.
+    """
+    index = {cell: i for i, cell in enumerate(cells)}
+    constraints = [
+        [sorted(index[cell] for cell in sentence.cells), sentence.count]
+        for sentence in sentences
+    ]
+
+    # Constraints each cell takes part in, and the last cell of each one
+    involved = [[] for _ in cells]
+    for c, (members, _) in enumerate(constraints):
+        for i in members:
+            involved[i].append(c)
+    last = [members[-1] for members, _ in constraints]
+
+    # Mines placed so far in each constraint
+    placed = [0] * len(constraints)
+    assignment = [0] * len(cells)
+    results = dict()
+    checks = [0]
+
+    def search(i, mines):
+        checks[0] += 1
+        if checks[0] % 1000 == 0 and time.perf_counter() > deadline:
+            return False
+        if i == len(cells):
+            result = results.setdefault(mines, [0, [0] * len(cells)])
+            result[0] += 1
+            for j, value in enumerate(assignment):
+                result[1][j] += value
+            return True
+        for value in (0, 1):
+            ok = True
+            for c in involved[i]:
+                placed[c] += value
+                count = constraints[c][1]
+                if placed[c] > count or (i == last[c] and placed[c] != count):
+                    ok = False
+            assignment[i] = value
+            if ok and not search(i + 1, mines + value):
+                return False
+            for c in involved[i]:
+                placed[c] -= value
+        return True
+
+    if not search(0, 0):
         return None
+    return {k: tuple(result) for k, result in results.items()}
+
+
+def eliminate_component(cells, sentences):
+    """
+    Deduces mines and safe cells among `cells` from `sentences`.
+
+    Each sentence is a row of the constraint matrix (1 for each of its
+    cells, and its count on the right-hand side). The matrix is brought
+    to reduced row echelon form using integer arithmetic only. A reduced
+    row whose right-hand side equals the largest (or smallest) value its
+    left-hand side can take fixes every cell it mentions.
+
+    Returns a pair (mines, safes) of sets of cells.
+    """
+    column = {cell: c for c, cell in enumerate(cells)}
+    rows = []
+    for sentence in sentences:
+        row = [0] * (len(cells) + 1)
+        for cell in sentence.cells:
+            row[column[cell]] = 1
+        row[-1] = sentence.count
+        rows.append(row)
+
+    # Clear each pivot column from every other row
+    pivot_row = 0
+    for c in range(len(cells)):
+        if pivot_row == len(rows):
+            break
+        pivot = None
+        for r in range(pivot_row, len(rows)):
+            if rows[r][c] != 0:
+                pivot = r
+                break
+        if pivot is None:
+            continue
+        rows[pivot_row], rows[pivot] = rows[pivot], rows[pivot_row]
+        p = rows[pivot_row]
+        for r in range(len(rows)):
+            a = rows[r][c]
+            if r == pivot_row or a == 0:
+                continue
+            row = [x * p[c] - y * a for x, y in zip(rows[r], p)]
+
+            # Keep the integers small
+            divisor = functools.reduce(math.gcd, row)
+            if divisor > 1:
+                row = [x // divisor for x in row]
+            rows[r] = row
+        pivot_row += 1
+
+    mines = set()
+    safes = set()
+    for row in rows:
+        high = sum(x for x in row[:-1] if x > 0)
+        low = sum(x for x in row[:-1] if x < 0)
+        if row[-1] != high and row[-1] != low:
+            continue
+
+        # At the maximum, positive cells are mines and negative ones safe;
+        # at the minimum, the other way around
+        for cell, x in zip(cells, row):
+            if x != 0:
+                if (x > 0) == (row[-1] == high):
+                    mines.add(cell)
+                else:
+                    safes.add(cell)
+
+    return mines, safes
+
+
+def convolve(distributions):
+    """
+    Given dictionaries mapping a number of mines to a number of ways,
+    returns the same dictionary for the sum of their mines.
+    """
+    total = {0: 1}
+    for distribution in distributions:
+        combined = dict()
+        for a, x in total.items():
+            for b, y in distribution.items():
+                combined[a + b] = combined.get(a + b, 0) + x * y
+        total = combined
+    return total
+
+
+def main():
+
+    # Check command-line arguments
+    if len(sys.argv) not in [1, 4]:
+        sys.exit("Usage: python minesweeper.py [height width mines]")
+    height, width, mines = 8, 8, 8
+    if len(sys.argv) == 4:
+        height, width, mines = (int(arg) for arg in sys.argv[1:])
+
+    # Create game and AI agent
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+
+    # Let the AI play until it hits a mine or has no moves left
+    moves = 0
+    lost = False
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_probabilistic_move()
+        if move is None:
+            break
+        if game.is_mine(move):
+            lost = True
+            break
+        for cell in game.reveal(move, ai.moves_made):
+            ai.add_knowledge(cell, game.nearby_mines(cell))
+            moves += 1
+    elapsed = time.perf_counter() - start
+
+    # Print results
+    print("Lost" if lost else "Won")
+    print(f"Moves: {moves}")
+    print(f"Moves per second: {moves / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI, SOLVERS
+
+# Seed of the first game; game k is seeded with SEED + k
+SEED = 0
+
+# Latency percentiles to report
+PERCENTILES = [50, 90, 99]
+
+
+def main():
+
+    # Check command-line arguments
+    if len(sys.argv) not in [5, 6]:
+        sys.exit("Usage: python simulate.py games height width mines [processes]")
+    games, height, width, mines = (int(arg) for arg in sys.argv[1:5])
+    processes = int(sys.argv[5]) if len(sys.argv) == 6 else None
+
+    # Play the same games with each solver
+    for solver in SOLVERS:
+
+        # Play all games across a pool of worker processes
+        start = time.perf_counter()
+        results = simulate(games, height, width, mines, processes, solver)
+        elapsed = time.perf_counter() - start
+
+        # Print results
+        wins = sum(result["won"] for result in results)
+        guesses = sum(result["guesses"] for result in results)
+        eliminated = sum(result["eliminated"] for result in results)
+        latencies = sorted(
+            latency for result in results for latency in result["latencies"]
+        )
+        print(f"Solver: {solver}")
+        print(f"Games: {games} ({height}x{width}, {mines} mines) in {elapsed:.2f}s")
+        print(f"Win rate: {100 * wins / games:.2f}%")
+        print(f"Guesses per game: {guesses / games:.2f}")
+        print(f"Cells deduced by elimination per game: {eliminated / games:.2f}")
+        print(f"Moves: {len(latencies)} ({len(latencies) / elapsed:.0f} per second)")
+        print("Inference latency:")
+        for p in PERCENTILES:
+            print(f"  p{p}: {1000 * percentile(latencies, p):.3f} ms")
+        print(f"  max: {1000 * latencies[-1] if latencies else 0:.3f} ms")
+        print()
+
+
+def simulate(games, height, width, mines, processes=None, solver="subset"):
+    """
+    Play `games` seeded games of the given size with the given `solver`
+    on `processes` worker processes (one per CPU if None), and return
+    the list of results from `play`, in order of seed.
+    """
+    jobs = [(SEED + k, height, width, mines, solver) for k in range(games)]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(play, jobs, chunksize=max(1, games // 100))
+
+
+def play(seed, height, width, mines, solver="subset"):
+    """
+    Let a MinesweeperAI using `solver` play one game seeded with `seed`
+    until it hits a mine or has no moves left.
+
+    Return a dictionary with whether the game was won, the number of
+    guesses made when no safe move was known, the number of cells
+    deduced by Gaussian elimination, and the time spent on inference
+    for each move.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines, solver=solver)
+
+    won = True
+    guesses = 0
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_probabilistic_move()
+            if move is None:
+                break
+            guesses += 1
+        if game.is_mine(move):
+            won = False
+            break
+        for cell in game.reveal(move, ai.moves_made):
+            ai.add_knowledge(cell, game.nearby_mines(cell))
+
+    return {
+        "won": won,
+        "guesses": guesses,
+        "eliminated": ai.eliminated,
+        "latencies": ai.inference_times
+    }
+
+
+def percentile(values, p):
+    """
+    Return the `p`th percentile of the sorted list `values`,
+    using the nearest-rank method.
+    """
+    if len(values) == 0:
+        return 0
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,162 @@ import sys
 
 from crossword import *
 
+# Inference during backtracking search: none, forward checking, or
+# maintaining arc consistency
+INFERENCES = ["none", "forward", "mac"]
+
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, inference="mac"):
         """
-        Create new CSP crossword generate.
+        Create new CSP crossword generate, using `inference` (one of
+        INFERENCES) during search.
+
+        Domains are bitsets over the sorted word list `self.words`: bit k
+        of `self.domains[var]` is set if `self.words[k]` is a possible
+        value of `var`. `self.letters[length, position, letter]` is the
+        bitset of words of that length with that letter at that position.
+
+        Domain changes made during search are recorded on `self.trail` as
+        (variable, previous domain) pairs, so they can be undone. The
+        search counts the assignments it tries (`self.nodes`), the ones it
+        has to undo (`self.backtracks`) and the values removed from domains
+        by inference (`self.prunes`).
         """
+        if inference not in INFERENCES:
+            raise ValueError(f"unknown inference {inference!r}")
         self.crossword = crossword
+        self.inference = inference
+        self.words = sorted(self.crossword.words)
+        self.index = {word: k for k, word in enumerate(self.words)}
         self.domains = {
-            var: self.crossword.words.copy()
+            var: (1 << len(self.words)) - 1
             for var in self.crossword.variables
         }
 
+        # Index words by length, and by letter at each position
+        self.lengths = dict()
+        self.letters = dict()
+        for k, word in enumerate(self.words):
+            bit = 1 << k
+            self.lengths[len(word)] = self.lengths.get(len(word), 0) | bit
+            for position, letter in enumerate(word):
+                key = (len(word), position, letter)
+                self.letters[key] = self.letters.get(key, 0) | bit
+
+        # Letters that appear at each position of words of each length
+        self.alphabet = dict()
+        for length, position, letter in self.letters:
+            self.alphabet.setdefault((length, position), []).append(letter)
+
+        self.neighbors = {
+            var: self.crossword.neighbors(var)
+            for var in self.crossword.variables
+        }
+
+        self.trail = []
+        self.nodes = 0
+        self.backtracks = 0
+        self.prunes = 0
+
+    def values(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        return self.decode(self.domains[var])
+
+    def decode(self, bitset):
+        """
+        Return the list of words whose bits are set in `bitset`.
+        """
+        # Bit k of the bitset is character k of its reversed binary string
+        bits = bin(bitset)[:1:-1]
+        words = []
+        k = bits.find("1")
+        while k >= 0:
+            words.append(self.words[k])
+            k = bits.find("1", k + 1)
+        return words
+
+    def domain_size(self, var):
+        """
+        Return the number of words in the domain of `var`.
+        """
+        return bin(self.domains[var]).count("1")
+
+    def allowed(self, x, y):
+        """
+        Return the bitset of words for `x` that agree with some word in
+        the domain of `y` on the letter where they overlap.
+        """
+        i, j = self.crossword.overlaps[x, y]
+        domain = self.domains[y]
+        allowed = 0
+        for letter in self.alphabet.get((y.length, j), []):
+            if self.letters[y.length, j, letter] & domain:
+                allowed |= self.letters.get((x.length, i, letter), 0)
+        return allowed
+
+    def reduce(self, var, domain):
+        """
+        Set the domain of `var` to `domain`, a subset of its current
+        domain, recording the change on the trail.
+        """
+        previous = self.domains[var]
+        if domain != previous:
+            self.trail.append((var, previous))
+            self.prunes += bin(previous).count("1") - bin(domain).count("1")
+            self.domains[var] = domain
+
+    def undo(self, mark):
+        """
+        Restore the domains changed since the trail had `mark` entries.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def infer(self, var, value, assignment):
+        """
+        Shrink the domains of unassigned variables after `var` is assigned
+        `value` in `assignment`, using `self.inference`. Forward checking
+        removes the values of `var`'s neighbors that conflict with `value`;
+        MAC then goes on to restore arc consistency with `ac3`. No other
+        variable may take `value` either, since words cannot repeat.
+
+        Return False if a domain ends up empty; return True otherwise.
+        """
+        bit = 1 << self.index[value]
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = bit
+        if self.inference == "none":
+            return True
+
+        # Words cannot repeat
+        changed = []
+        for other in self.crossword.variables:
+            if other not in assignment and self.domains[other] & bit:
+                self.reduce(other, self.domains[other] & ~bit)
+                if self.domains[other] == 0:
+                    return False
+                changed.append(other)
+
+        # Neighbors must agree with `value` where they overlap
+        for neighbor in self.neighbors[var]:
+            if neighbor not in assignment:
+                self.reduce(neighbor, self.domains[neighbor] & self.allowed(neighbor, var))
+                if self.domains[neighbor] == 0:
+                    return False
+                changed.append(neighbor)
+
+        if self.inference == "forward":
+            return True
+        return self.ac3([
+            (z, x) for x in changed for z in self.neighbors[x]
+            if z not in assignment
+        ])
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -91,6 +234,10 @@ class CrosswordCreator():
         """
         self.enforce_node_consistency()
         self.ac3()
+
+        # Only changes made during search need undoing or counting
+        self.trail = []
+        self.prunes = 0
         return self.backtrack(dict())
 
     def enforce_node_consistency(self):
@@ -99,10 +246,8 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        for var, var_domain in self.domains.items():
-            for d in list(var_domain):
-                if len(d) != var.length:
-                    self.domains[var].remove(d)
+        for var in self.domains:
+            self.domains[var] &= self.lengths.get(var.length, 0)
 
     def revise(self, x, y):
         """
@@ -113,22 +258,12 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        revised = False
-
-        overlap = self.crossword.overlaps[x, y]
-
-        if overlap is None:
-            return revised
+        if self.crossword.overlaps[x, y] is None:
+            return False
 
-        for dx in list(self.domains[x]):
-            check = 0
-            for dy in self.domains[y]:
-                if dy[overlap[1]] == dx[overlap[0]]:
-                    check += 1
-            if check == 0:
-                self.domains[x].remove(dx)
-                revised = True
-        
+        domain = self.domains[x] & self.allowed(x, y)
+        revised = domain != self.domains[x]
+        self.reduce(x, domain)
         return revised
     
     def ac3(self, arcs=None):
@@ -158,10 +293,10 @@ class CrosswordCreator():
         while queue:
             arc = queue.pop()
             if self.revise(arc[0], arc[1]):
-                if len(self.domains[arc[0]]) == 0:
+                if self.domains[arc[0]] == 0:
                     return False
                 #For each z in x neighbors except y
-                for z in self.crossword.neighbors(arc[0]):
+                for z in self.neighbors[arc[0]]:
                     if z != arc[1]:
                         queue.append((z, arc[0]))
 
@@ -219,20 +354,31 @@ class CrosswordCreator():
         """
         sorted_var_domain = list()
 
-        var_domain = list(self.domains[var])
+        var_domain = self.values(var)
 
-        var_neighbors = self.crossword.neighbors(var)
+        var_neighbors = self.neighbors[var]
+
+        # For each neighbor, how many of its values have each letter where
+        # it overlaps `var`, and which of its values `var` could also take
+        ruled_out = []
+        for neighbor in var_neighbors:
+            overlap = self.crossword.overlaps[var, neighbor]
+            domain = self.domains[neighbor]
+            kept = {
+                letter: bin(domain & self.letters[neighbor.length, overlap[1], letter]).count("1")
+                for letter in self.alphabet.get((neighbor.length, overlap[1]), [])
+            }
+            shared = set(self.decode(domain & self.domains[var]))
+            ruled_out.append((overlap[0], self.domain_size(neighbor), kept, shared))
 
         temp = dict()
         for value in var_domain:
             count = 0
-            for neighbor in var_neighbors:
-                overlap = self.crossword.overlaps[var, neighbor]
-                for neighbor_value in self.domains[neighbor]:
-                    if value[overlap[0]] != neighbor_value[overlap[1]]:
-                        count += 1
-                    if value == neighbor_value:
-                        count += 1
+            for position, size, kept, shared in ruled_out:
+                #Neighbor values with a different letter at the overlap
+                count += size - kept.get(value[position], 0)
+                if value in shared:
+                    count += 1
             temp[value] = count
 
         sorted_var_domain = list(dict(sorted(temp.items(), key=lambda x: x[1], reverse=False)).keys())
@@ -252,9 +398,9 @@ class CrosswordCreator():
         min_domain = 1000000
         for var in self.crossword.variables:
             if var not in assignment:
-                if len(self.domains[var]) < min_domain:
+                if self.domain_size(var) < min_domain:
                     var_min = var
-                    min_domain = len(self.domains[var])
+                    min_domain = self.domain_size(var)
         
         return var_min
 
@@ -266,6 +412,9 @@ class CrosswordCreator():
         `assignment` is a mapping from variables (keys) to words (values).
 
         If no assignment is possible, return None.
+
+        After each assignment, `infer` prunes the remaining domains; its
+        changes are undone from the trail if the assignment fails.
         """
         # Check if assignment is complete
         if len(assignment) == len(self.crossword.variables):
@@ -277,9 +426,14 @@ class CrosswordCreator():
             new_assignment = assignment.copy()
             new_assignment[var] = value
             if self.consistent(new_assignment):
-                result = self.backtrack(new_assignment)
-                if result is not None:
-                    return result
+                self.nodes += 1
+                mark = len(self.trail)
+                if self.infer(var, value, new_assignment):
+                    result = self.backtrack(new_assignment)
+                    if result is not None:
+                        return result
+                self.undo(mark)
+                self.backtracks += 1
         
         return None
 
@@ -307,6 +461,8 @@ def main():
         creator.print(assignment)
         if output:
             creator.save(assignment, output)
+    print(f"Nodes: {creator.nodes}, backtracks: {creator.backtracks}, "
+          f"prunes: {creator.prunes}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+from heredity import METHODS, infer, inheritance_table, load_data, probability_arrays
+
+# Output formats, by file extension
+FORMATS = [".csv", ".json"]
+
+# Probability tables shared by every family a worker process handles
+worker_tables = None
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4, 5, 6] or sys.argv[5:] not in [[], ["log"]]:
+        sys.exit("Usage: python batch.py directory output.csv|output.json "
+                 "[method] [processes] [log]")
+    directory, output = sys.argv[1], sys.argv[2]
+    method = sys.argv[3] if len(sys.argv) > 3 else "elimination"
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    log = len(sys.argv) == 6
+    if method not in METHODS:
+        sys.exit(f"Method must be one of {', '.join(METHODS)}")
+    if log and method != "enumeration":
+        sys.exit("Only enumeration works in log space")
+    if os.path.splitext(output)[1] not in FORMATS:
+        sys.exit(f"Output must be one of {', '.join(FORMATS)} files")
+
+    results = process_directory(directory, method, processes, log)
+    save_results(results, output)
+    people = sum(len(probabilities) for probabilities in results.values())
+    print(f"Wrote probabilities for {people} people in {len(results)} families to {output}")
+
+
+def process_directory(directory, method="elimination", processes=None, log=False):
+    """
+    Compute probabilities for every family CSV file in `directory` with
+    `method`, in log space if `log` is True (see `heredity.infer`),
+    across `processes` worker processes (one per CPU if None).
+
+    The probability tables are computed once here and handed to each
+    worker when it starts, rather than once per family. Return a
+    dictionary mapping each file name to its family's probabilities.
+    """
+    filenames = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".csv")
+    )
+    paths = [os.path.join(directory, filename) for filename in filenames]
+    tables = (inheritance_table(), probability_arrays())
+
+    with multiprocessing.Pool(
+        processes, initializer=set_worker_tables, initargs=tables
+    ) as pool:
+        jobs = [(path, method, log) for path in paths]
+        results = pool.starmap(process_file, jobs, chunksize=max(1, len(jobs) // 100))
+    return dict(zip(filenames, results))
+
+
+def set_worker_tables(inheritance, arrays):
+    """
+    Store the probability tables in a worker process.
+    """
+    global worker_tables
+    worker_tables = (inheritance, arrays)
+
+
+def process_file(path, method, log=False):
+    """
+    Load the family in `path`, and return its probabilities computed
+    with `method` and the worker's tables.
+    """
+    inheritance, arrays = worker_tables
+    return infer(load_data(path), method, inheritance, arrays, log)
+
+
+def save_results(results, output):
+    """
+    Save the probabilities of every family in `results` to `output`,
+    either as CSV (one row per person) or as JSON (nested by file and
+    person), depending on its extension.
+    """
+    if output.endswith(".json"):
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        return
+
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "name", "gene_2", "gene_1", "gene_0",
+                         "trait_true", "trait_false"])
+        for filename, probabilities in results.items():
+            for person, distributions in probabilities.items():
+                gene, trait = distributions["gene"], distributions["trait"]
+                writer.writerow([filename, person, gene[2], gene[1], gene[0],
+                                 trait[True], trait[False]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from generate import generate_pedigree
+from heredity import (
+    enumerate_probabilities, eliminate_probabilities, load_data,
+    vectorized_probabilities
+)
+from sampling import gibbs_sampling, likelihood_weighting
+
+# Bundled families, and sizes of the synthetic families
+DATA = ["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+SIZES = [6, 10, 50, 200]
+
+# Synthetic families: share of known traits, and chance of a couple of
+# relatives with and without loops in the family tree
+OBSERVED = 0.5
+INBREEDING = [0.0, 0.2]
+SEED = 0
+
+# Samples drawn by the sampling engines, which run in this process so
+# their memory use is measured
+SAMPLES = 20000
+
+# Engines, and the largest family each is run on
+ENGINES = {
+    "enumeration": enumerate_probabilities,
+    "vectorized": vectorized_probabilities,
+    "elimination": eliminate_probabilities,
+    "weighting": lambda people: likelihood_weighting(
+        people, SAMPLES, processes=1, seed=SEED
+    )[0],
+    "gibbs": lambda people: gibbs_sampling(
+        people, SAMPLES, processes=1, seed=SEED
+    )[0]
+}
+LIMITS = {
+    "enumeration": 10,
+    "vectorized": 10
+}
+EXACT = ["enumeration", "vectorized", "elimination"]
+
+
+def main():
+    if len(sys.argv) == 1:
+        sizes = SIZES
+    else:
+        sizes = [int(arg) for arg in sys.argv[1:]]
+
+    # Bundled families, if run from the project directory
+    for filename in DATA:
+        if os.path.exists(filename):
+            benchmark(filename, load_data(filename))
+
+    for size in sizes:
+        for inbreeding in INBREEDING:
+            people = generate_pedigree(size, OBSERVED, inbreeding, SEED)
+            benchmark(f"family of {size} (inbreeding {inbreeding})", people)
+
+
+def benchmark(name, people):
+    """
+    Compute everyone's probabilities with each engine that can handle
+    the family, and print the time taken, the peak memory allocated and
+    the largest difference from the first exact engine (in EXACT) to
+    finish.
+    """
+    print(f"{name}: {len(people)} people")
+    expected = None
+    for engine, compute in ENGINES.items():
+        if len(people) > LIMITS.get(engine, len(people)):
+            continue
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            probabilities = compute(people)
+        except ValueError as e:
+            tracemalloc.stop()
+            print(f"  {engine:>12}: skipped ({e})")
+            continue
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if expected is None and engine in EXACT:
+            expected = probabilities
+        if expected is None:
+            difference = "no exact result to compare with"
+        else:
+            error = max(
+                abs(probabilities[person][field][value] - expected[person][field][value])
+                for person in people
+                for field in expected[person]
+                for value in expected[person][field]
+            )
+            difference = f"max difference {error:.1e}"
+        print(f"  {engine:>12}: {elapsed:8.4f}s, {peak / 2 ** 20:8.2f} MiB, "
+              f"{difference}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import csv
+import random
+import sys
+
+from heredity import PROBS, inheritance_table
+
+# Share of people whose trait is known, and chance that a couple is made
+# of two relatives rather than a relative and someone new to the family
+OBSERVED = 0.5
+INBREEDING = 0.0
+
+# Most children a couple has
+MAX_CHILDREN = 3
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [3, 4, 5, 6]:
+        sys.exit("Usage: python generate.py people output.csv "
+                 "[observed] [inbreeding] [seed]")
+    n = int(sys.argv[1])
+    observed = float(sys.argv[3]) if len(sys.argv) > 3 else OBSERVED
+    inbreeding = float(sys.argv[4]) if len(sys.argv) > 4 else INBREEDING
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    people = generate_pedigree(n, observed, inbreeding, seed)
+    save_pedigree(people, sys.argv[2])
+    print(f"Generated a family of {len(people)} people in {sys.argv[2]}")
+
+
+def generate_pedigree(n, observed=OBSERVED, inbreeding=INBREEDING, seed=None):
+    """
+    Return a random family of `n` people over several generations, in
+    the format returned by `heredity.load_data`.
+
+    The family grows from a founding couple: each new couple is a
+    random member of the family and, with probability `inbreeding`,
+    another member (which creates loops in the family tree), otherwise
+    a new founder. Genes and traits are sampled from PROBS, and each
+    person's trait is known with probability `observed`.
+    """
+    rng = random.Random(seed)
+    inheritance = inheritance_table()
+    people = dict()
+    genes = dict()
+
+    def add(mother=None, father=None):
+        name = f"person{len(people)}"
+        if mother is None:
+            distribution = PROBS["gene"]
+        else:
+            distribution = inheritance[genes[mother], genes[father]]
+        genes[name] = rng.choices(list(distribution), list(distribution.values()))[0]
+        trait = rng.random() < PROBS["trait"][genes[name]][True]
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait if rng.random() < observed else None
+        }
+        return name
+
+    # Members of the family by descent, who may start new couples
+    members = [add() for _ in range(min(n, 2))]
+    couple = list(members)
+    while len(people) < n:
+        for _ in range(rng.randint(1, MAX_CHILDREN)):
+            if len(people) < n:
+                members.append(add(*couple))
+
+        # Choose the next couple
+        if len(people) < n:
+            parent = rng.choice(members)
+            others = [member for member in members if member != parent]
+            if others and rng.random() < inbreeding:
+                partner = rng.choice(others)
+            else:
+                partner = add()
+            couple = rng.sample([parent, partner], 2)
+    return people
+
+
+def save_pedigree(people, filename):
+    """
+    Save a family in the format returned by `heredity.load_data` to the
+    CSV file `filename`.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person in people.values():
+            trait = "" if person["trait"] is None else int(person["trait"])
+            writer.writerow([
+                person["name"], person["mother"] or "", person["father"] or "", trait
+            ])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import csv
+import heapq
 import itertools
+import math
+import numpy as np
 import sys
 
 PROBS = {
@@ -36,62 +39,170 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Possible numbers of copies of the gene
+GENES = (0, 1, 2)
+
+# Inference methods: enumerating every assignment one at a time or as
+# arrays, or variable elimination
+METHODS = ["enumeration", "vectorized", "elimination"]
+
+# Number of joint probabilities computed at a time by vectorized enumeration
+CHUNK_SIZE = 1 << 20
+
+# Largest number of people in one step of variable elimination, whose
+# factor has 3 ** MAX_CLIQUE_SIZE entries
+MAX_CLIQUE_SIZE = 12
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3, 4] or sys.argv[3:] not in [[], ["log"]]:
+        sys.exit("Usage: python heredity.py data.csv [method] [log]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) > 2 else "elimination"
+    log = len(sys.argv) == 4
+    if method not in METHODS:
+        sys.exit(f"Method must be one of {', '.join(METHODS)}")
+    if log and method != "enumeration":
+        sys.exit("Only enumeration works in log space")
+
+    try:
+        probabilities = infer(people, method, log=log)
+    except ValueError as e:
+        sys.exit(f"{e}; try sampling.py instead")
 
-    # Keep track of gene and trait probabilities for each person
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def infer(people, method="elimination", inheritance=None, arrays=None, log=False):
+    """
+    Return gene and trait probability distributions for each person,
+    computed with one of METHODS. `inheritance` and `arrays` are the
+    tables from `inheritance_table` and `probability_arrays`, which are
+    computed if not given.
+
+    If `log` is True, enumeration sums joint probabilities in log space
+    (see `enumerate_probabilities`). Only enumeration supports it:
+    elimination keeps large families in range by rescaling its messages.
+    """
+    if log and method != "enumeration":
+        raise ValueError("only enumeration works in log space")
+    if method == "enumeration":
+        return enumerate_probabilities(people, log, inheritance)
+    elif method == "vectorized":
+        return vectorized_probabilities(people, arrays)
+    elif method == "elimination":
+        return eliminate_probabilities(people, inheritance)
+    raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+
+
+def enumerate_probabilities(people, log=False, inheritance=None):
+    """
+    Return gene and trait probability distributions for each person,
+    by summing the joint probability of every assignment of genes
+    consistent with the known traits.
+
+    Unknown traits are summed out of every joint probability instead of
+    being enumerated, and read off the gene distributions at the end
+    (see `trait_distribution`). People with an unknown trait and no
+    children do not affect anyone else, so they are left out of the
+    enumeration too: their genes follow from the distribution of their
+    parents' genes, which is tallied along the way.
+
+    If `log` is True, joint probabilities are summed in log space, so
+    large families do not underflow to 0. `inheritance` is the table from
+    `inheritance_table`, computed if not given.
+    """
+    parents = set(
+        people[person][parent] for person in people
+        for parent in ["mother", "father"]
+        if people[person][parent] is not None
+    )
+    relevant = {
+        person: people[person] for person in people
+        if people[person]["trait"] is not None or person in parents
+    }
+    observed = set(
+        person for person in people if people[person]["trait"] is not None
+    )
+    have_trait = set(person for person in observed if people[person]["trait"])
+
+    # Keep track of gene probabilities for each person taking part, and
+    # of the genes of the parents of each child left out
+    zero = -math.inf if log else 0
     probabilities = {
         person: {
             "gene": {
-                2: 0,
-                1: 0,
-                0: 0
+                2: zero,
+                1: zero,
+                0: zero
             },
             "trait": {
-                True: 0,
-                False: 0
+                True: zero,
+                False: zero
             }
         }
-        for person in people
+        for person in relevant
+    }
+    parent_genes = {
+        person: dict() for person in people
+        if person not in relevant and people[person]["mother"] is not None
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Loop over all sets of people who might have the gene
+    names = set(relevant)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+
+            # Update probabilities with new joint probability
+            p = joint_probability(
+                relevant, one_gene, two_genes, have_trait, observed, log
+            )
+            update(probabilities, one_gene, two_genes, have_trait, p, log)
+
+            for person in parent_genes:
+                key = tuple(
+                    1 if parent in one_gene else 2 if parent in two_genes else 0
+                    for parent in (people[person]["mother"], people[person]["father"])
+                )
+                tally = parent_genes[person]
+                tally[key] = log_add(tally.get(key, zero), p) if log else tally.get(key, 0) + p
 
     # Ensure probabilities sum to 1
-    normalize(probabilities)
+    normalize(probabilities, log)
 
-    # Print results
+    # Genes of the people left out, from their parents' genes
+    inheritance = inheritance or inheritance_table()
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        if person in relevant:
+            gene = probabilities[person]["gene"]
+        elif person in parent_genes:
+            tally = parent_genes[person]
+            if log:
+                total = log_sum(tally.values())
+                weights = {pair: math.exp(p - total) for pair, p in tally.items()}
+            else:
+                total = sum(tally.values())
+                weights = {pair: p / total for pair, p in tally.items()}
+            gene = {
+                genes: sum(p * inheritance[pair][genes] for pair, p in weights.items())
+                for genes in (2, 1, 0)
+            }
+        else:
+            gene = dict(PROBS["gene"])
+        probabilities[person] = {
+            "gene": gene,
+            "trait": trait_distribution(gene, people[person]["trait"])
+        }
+    return {person: probabilities[person] for person in people}
 
 
 def load_data(filename):
@@ -118,17 +229,17 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Generate all possible subsets of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def joint_probability(people, one_gene, two_genes, have_trait, observed=None,
+                      log=False):
     """
     Compute and return a joint probability.
 
@@ -138,8 +249,15 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    If `observed` is given, only the traits of people in `observed` are
+    included; everyone else's trait is summed out.
+
+    If `log` is True, return the natural logarithm of the probability,
+    summing the logarithms of the factors so that large families do not
+    underflow to 0.
     """
-    joint_prob = 1
+    joint_prob = 0 if log else 1
 
     tracking = dict()
 
@@ -163,7 +281,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     for person in tracking:
         #If we dont know the person's parents
         if people[person]["mother"] is None:
-            tracking[person]["probability"] = tracking[person]["probability"] * PROBS["gene"][tracking[person]["gene"]] * PROBS["trait"][tracking[person]["gene"]][tracking[person]["trait"]]
+            tracking[person]["probability"] = tracking[person]["probability"] * PROBS["gene"][tracking[person]["gene"]]
         #If we know the person's parents
         else:
             if tracking[person]["gene"] == 2:
@@ -183,7 +301,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
                 elif tracking[people[person]["father"]]["gene"] == 0:
                     p_temp = p_temp * PROBS["mutation"]
 
-                tracking[person]["probability"] = p_temp * PROBS["trait"][tracking[person]["gene"]][tracking[person]["trait"]]
+                tracking[person]["probability"] = p_temp
 
             elif tracking[person]["gene"] == 0:
                 p_temp = 1
@@ -202,7 +320,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
                 elif tracking[people[person]["father"]]["gene"] == 0:
                     p_temp = p_temp * (1 - PROBS["mutation"])
 
-                tracking[person]["probability"] = p_temp * PROBS["trait"][tracking[person]["gene"]][tracking[person]["trait"]]
+                tracking[person]["probability"] = p_temp
 
             elif tracking[person]["gene"] == 1:
                 p_temp = 0
@@ -214,38 +332,60 @@ def joint_probability(people, one_gene, two_genes, have_trait):
                 else:
                     p_temp = (1 - PROBS["mutation"])*(1 - PROBS["mutation"]) + PROBS["mutation"]*PROBS["mutation"]
 
-                tracking[person]["probability"] = p_temp * PROBS["trait"][tracking[person]["gene"]][tracking[person]["trait"]]
+                tracking[person]["probability"] = p_temp
 
-        joint_prob = joint_prob * tracking[person]["probability"]
+        #Summing out an unobserved trait leaves a factor of 1
+        if observed is None or person in observed:
+            tracking[person]["probability"] = tracking[person]["probability"] * PROBS["trait"][tracking[person]["gene"]][tracking[person]["trait"]]
+
+        if log:
+            joint_prob = joint_prob + math.log(tracking[person]["probability"])
+        else:
+            joint_prob = joint_prob * tracking[person]["probability"]
             
     return joint_prob
 
-def update(probabilities, one_gene, two_genes, have_trait, p):
+def update(probabilities, one_gene, two_genes, have_trait, p, log=False):
     """
     Add to `probabilities` a new joint probability `p`.
     Each person should have their "gene" and "trait" distributions updated.
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
+
+    If `log` is True, `p` and the values in `probabilities` are
+    logarithms of probabilities, and are added with `log_add`.
     """
+    add = log_add if log else lambda a, b: a + b
     for person in probabilities:
+        gene = probabilities[person]["gene"]
         if person in one_gene:
-            probabilities[person]["gene"][1] += p 
+            gene[1] = add(gene[1], p)
         elif person in two_genes:
-            probabilities[person]["gene"][2] += p 
+            gene[2] = add(gene[2], p)
         else:
-            probabilities[person]["gene"][0] += p 
+            gene[0] = add(gene[0], p)
 
-        if person in have_trait:
-            probabilities[person]["trait"][True] += p
-        else:
-            probabilities[person]["trait"][False] += p
+        trait = probabilities[person]["trait"]
+        trait[person in have_trait] = add(trait[person in have_trait], p)
 
 
-def normalize(probabilities):
+def normalize(probabilities, log=False):
     """
     Update `probabilities` such that each probability distribution
     is normalized (i.e., sums to 1, with relative proportions the same).
+
+    If `log` is True, the values in `probabilities` are logarithms of
+    (unnormalized) probabilities, and are replaced by the normalized
+    probabilities themselves.
     """
+    if log:
+        for person in probabilities:
+            for field in probabilities[person]:
+                values = probabilities[person][field]
+                total = log_sum(values.values())
+                values.update((x, math.exp(y - total)) for x, y in values.items())
+        return
+
     for person in probabilities:
         gene = probabilities[person]["gene"]
         upd_opt_gene = 1/sum(gene.values())
@@ -254,7 +394,366 @@ def normalize(probabilities):
         trait = probabilities[person]["trait"]
         upd_opt_trait = 1/sum(trait.values())
         trait.update((x, y*upd_opt_trait) for x, y in trait.items())
-        
+
+
+def log_add(a, b):
+    """
+    Return log(exp(a) + exp(b)) without leaving log space.
+    """
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def log_sum(values):
+    """
+    Return the logarithm of the sum of the exponentials of `values`
+    (log-sum-exp), shifting by the largest value to avoid underflow.
+    """
+    values = list(values)
+    largest = max(values)
+    if largest == -math.inf:
+        return largest
+    return largest + math.log(sum(math.exp(value - largest) for value in values))
+
+
+def inheritance_table():
+    """
+    Return a dictionary mapping each pair (mother's genes, father's
+    genes) to the probability distribution of the child's genes.
+    """
+    mutation = PROBS["mutation"]
+
+    # Probability that a parent with that many genes passes one on
+    passes = {0: mutation, 1: 0.5, 2: 1 - mutation}
+
+    table = dict()
+    for mother, father in itertools.product(GENES, repeat=2):
+        m, f = passes[mother], passes[father]
+        table[mother, father] = {
+            0: (1 - m) * (1 - f),
+            1: m * (1 - f) + (1 - m) * f,
+            2: m * f
+        }
+    return table
+
+
+def probability_arrays():
+    """
+    Return the probabilities in PROBS as arrays indexed by gene counts:
+    `(gene, trait, inheritance)`, where `gene[g]` is the unconditional
+    probability of g genes, `trait[g, t]` the probability of trait t
+    (0 or 1) given g genes, and `inheritance[m, f, g]` the probability
+    of g genes given the mother's m and the father's f genes.
+    """
+    gene = np.array([PROBS["gene"][genes] for genes in GENES])
+    trait = np.array([
+        [PROBS["trait"][genes][False], PROBS["trait"][genes][True]]
+        for genes in GENES
+    ])
+    table = inheritance_table()
+    inheritance = np.array([
+        [[table[m, f][genes] for genes in GENES] for f in GENES]
+        for m in GENES
+    ])
+    return gene, trait, inheritance
+
+
+def joint_probabilities(people, genes, traits, arrays=None):
+    """
+    Compute the joint probabilities of many assignments at once, like
+    `joint_probability`.
+
+    `genes` and `traits` are integer arrays whose last axis runs over
+    the people, in the order of `people`: `genes[..., i]` is the number
+    of genes and `traits[..., i]` is 1 if person i has the trait, else 0.
+    The two arrays are broadcast against each other, and an array of
+    joint probabilities with the remaining axes is returned. `arrays` are
+    the tables from `probability_arrays`, computed if not given.
+    """
+    gene, trait, inheritance = arrays or probability_arrays()
+    index = {person: i for i, person in enumerate(people)}
+
+    joint = 1
+    for i, person in enumerate(people):
+        if people[person]["mother"] is None:
+            p = gene[genes[..., i]]
+        else:
+            mother = genes[..., index[people[person]["mother"]]]
+            father = genes[..., index[people[person]["father"]]]
+            p = inheritance[mother, father, genes[..., i]]
+        joint = joint * p * trait[genes[..., i], traits[..., i]]
+    return joint
+
+
+def vectorized_probabilities(people, arrays=None):
+    """
+    Return gene and trait probability distributions for each person,
+    like `enumerate_probabilities`, but computing the joint probabilities
+    of all assignments as arrays, CHUNK_SIZE at a time.
+
+    Gene assignments are the base-3 digits of 0 .. 3^n - 1, and trait
+    assignments the combinations of unknown traits with the known
+    ones fixed; every chunk pairs some gene assignments with all trait
+    assignments. `arrays` are the tables from `probability_arrays`,
+    computed if not given.
+    """
+    names = list(people)
+    n = len(names)
+    arrays = arrays or probability_arrays()
+
+    # All trait assignments consistent with the evidence
+    unknown = [i for i, person in enumerate(names) if people[person]["trait"] is None]
+    known = [int(bool(people[person]["trait"])) for person in names]
+    traits = np.tile(np.array(known, dtype=np.int64), (2 ** len(unknown), 1))
+    for k, i in enumerate(unknown):
+        traits[:, i] = (np.arange(len(traits)) >> k) & 1
+
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros((n, 2))
+    rows = max(1, CHUNK_SIZE // len(traits))
+    powers = 3 ** np.arange(n)
+    for start in range(0, 3 ** n, rows):
+        codes = np.arange(start, min(start + rows, 3 ** n))
+        genes = codes[:, None] // powers % 3
+        joint = joint_probabilities(
+            people, genes[:, None, :], traits[None, :, :], arrays
+        )
+
+        # Add each joint probability to every person's assigned values
+        by_genes = joint.sum(axis=1)
+        by_traits = joint.sum(axis=0)
+        for i in range(n):
+            gene_totals[i] += np.bincount(genes[:, i], by_genes, minlength=3)
+            trait_totals[i] += np.bincount(traits[:, i], by_traits, minlength=2)
+
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+    return {
+        person: {
+            "gene": {genes: gene_totals[i, genes].item() for genes in (2, 1, 0)},
+            "trait": {True: trait_totals[i, 1].item(), False: trait_totals[i, 0].item()}
+        }
+        for i, person in enumerate(names)
+    }
+
+
+def gene_factors(people, inheritance=None):
+    """
+    Return the factors of the family's Bayesian network over genes,
+    as a list of `(variables, table)` pairs: `variables` is a tuple of
+    names, and `table` maps each tuple of their gene counts to a value.
+
+    Each person has one factor: the probability of their genes, given
+    their parents' genes if known, times the probability of their trait
+    if it is known. Unknown traits depend on nothing else, so they are
+    summed out of the network (see `trait_distribution`). `inheritance`
+    is the table from `inheritance_table`, computed if not given.
+    """
+    inheritance = inheritance or inheritance_table()
+    factors = []
+    for person in people:
+        trait = people[person]["trait"]
+        likelihood = {
+            genes: 1 if trait is None else PROBS["trait"][genes][trait]
+            for genes in GENES
+        }
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is None:
+            factors.append(((person,), {
+                (genes,): PROBS["gene"][genes] * likelihood[genes]
+                for genes in GENES
+            }))
+        else:
+            factors.append(((person, mother, father), {
+                (genes, m, f): inheritance[m, f][genes] * likelihood[genes]
+                for genes, m, f in itertools.product(GENES, repeat=3)
+            }))
+    return factors
+
+
+def multiply(factors):
+    """
+    Return the product of a list of factors.
+    """
+    variables = []
+    for factor_variables, _ in factors:
+        for variable in factor_variables:
+            if variable not in variables:
+                variables.append(variable)
+    variables = tuple(variables)
+
+    # Where each factor's variables are in the product's assignments
+    positions = [
+        (tuple(variables.index(v) for v in factor_variables), table)
+        for factor_variables, table in factors
+    ]
+
+    table = dict()
+    for assignment in itertools.product(GENES, repeat=len(variables)):
+        p = 1
+        for indices, factor_table in positions:
+            p *= factor_table[tuple(assignment[i] for i in indices)]
+        table[assignment] = p
+    return variables, table
+
+
+def sum_out(factor, keep):
+    """
+    Return `factor` with every variable not in `keep` summed out.
+    """
+    variables, table = factor
+    indices = [i for i, variable in enumerate(variables) if variable in keep]
+    result = dict()
+    for assignment, p in table.items():
+        key = tuple(assignment[i] for i in indices)
+        result[key] = result.get(key, 0) + p
+    return tuple(variables[i] for i in indices), result
+
+
+def rescale(factor):
+    """
+    Return `factor` divided by its largest value.
+    """
+    variables, table = factor
+    largest = max(table.values())
+    if largest == 0:
+        return factor
+    return variables, {key: p / largest for key, p in table.items()}
+
+
+def elimination_order(factors):
+    """
+    Return an order in which to eliminate the variables of `factors`,
+    choosing at each step a variable with the fewest neighbours
+    (minimum degree) in the graph linking variables that share a factor.
+    """
+    neighbours = dict()
+    for variables, _ in factors:
+        for variable in variables:
+            neighbours.setdefault(variable, set()).update(variables)
+    for variable in neighbours:
+        neighbours[variable].discard(variable)
+
+    # Heap entries go stale when a degree changes, and are then skipped
+    heap = [(len(neighbours[v]), v) for v in neighbours]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        degree, variable = heapq.heappop(heap)
+        if variable not in neighbours or degree != len(neighbours[variable]):
+            continue
+        order.append(variable)
+
+        # Eliminating a variable links all of its neighbours
+        linked = neighbours.pop(variable)
+        for neighbour in linked:
+            neighbours[neighbour].discard(variable)
+            neighbours[neighbour].update(linked - {neighbour})
+            heapq.heappush(heap, (len(neighbours[neighbour]), neighbour))
+    return order
+
+
+def eliminate_probabilities(people, inheritance=None):
+    """
+    Return gene and trait probability distributions for each person,
+    like `enumerate_probabilities`, by variable elimination.
+
+    Eliminating the people's genes one at a time builds a junction tree:
+    each elimination step is a clique, which sends the factor it leaves
+    behind to the clique that later uses it. A second pass sends
+    messages back down the tree, after which every person's marginal is
+    read off the clique that eliminated them. For tree-shaped families
+    cliques hold at most a person and their parents, so the run time
+    is linear in the size of the family.
+
+    Messages are rescaled so their largest value is 1, since only their
+    proportions matter; otherwise they would shrink with every person
+    they account for, and underflow to 0 in large families.
+    `inheritance` is the table from `inheritance_table`, computed if
+    not given. Raise ValueError if a step would involve more than
+    MAX_CLIQUE_SIZE people, as families with many loops can require.
+    """
+    factors = gene_factors(people, inheritance)
+
+    # Factors not used yet, as (factor, clique that sent it or None),
+    # and the ones each variable appears in
+    pending = dict(enumerate((factor, None) for factor in factors))
+    containing = dict()
+    for key, (factor, _) in pending.items():
+        for variable in factor[0]:
+            containing.setdefault(variable, set()).add(key)
+
+    # Upward pass: eliminate each variable, recording the cliques
+    cliques = []
+    for variable in elimination_order(factors):
+        used = []
+        for key in sorted(containing.pop(variable)):
+            factor, source = pending.pop(key)
+            for other in factor[0]:
+                if other != variable:
+                    containing[other].discard(key)
+            used.append((factor, source))
+        clique = {
+            "variable": variable,
+            "factors": [factor for factor, source in used if source is None],
+            "children": [source for _, source in used if source is not None],
+            "down": None
+        }
+        scope = set(v for factor, _ in used for v in factor[0])
+        if len(scope) > MAX_CLIQUE_SIZE:
+            raise ValueError(
+                f"elimination needs a factor over {len(scope)} people, "
+                f"more than {MAX_CLIQUE_SIZE}"
+            )
+        product = multiply([factor for factor, _ in used])
+        clique["up"] = rescale(sum_out(product, set(product[0]) - {variable}))
+
+        key = len(factors) + len(cliques)
+        pending[key] = (clique["up"], len(cliques))
+        for other in clique["up"][0]:
+            containing[other].add(key)
+        cliques.append(clique)
+
+    # Downward pass: every clique is created after its children
+    for clique in reversed(cliques):
+        incoming = [cliques[child]["up"] for child in clique["children"]]
+        if clique["down"] is not None:
+            incoming.append(clique["down"])
+        for k, child in enumerate(clique["children"]):
+            others = incoming[:k] + incoming[k + 1:]
+            cliques[child]["down"] = rescale(sum_out(
+                multiply(clique["factors"] + others),
+                set(cliques[child]["up"][0])
+            ))
+        clique["belief"] = multiply(clique["factors"] + incoming)
+
+    # Read each person's marginal off their clique
+    probabilities = dict()
+    for clique in cliques:
+        person = clique["variable"]
+        _, table = sum_out(clique["belief"], {person})
+        total = sum(table.values())
+        gene = {genes: table[genes,] / total for genes in (2, 1, 0)}
+        probabilities[person] = {
+            "gene": gene,
+            "trait": trait_distribution(gene, people[person]["trait"])
+        }
+    return {person: probabilities[person] for person in people}
+
+
+def trait_distribution(gene, trait):
+    """
+    Return the probability distribution of a person's trait, given the
+    distribution `gene` of their genes and their known `trait` (if any).
+    """
+    if trait is not None:
+        return {True: float(trait), False: float(not trait)}
+    have_trait = sum(gene[genes] * PROBS["trait"][genes][True] for genes in GENES)
+    return {True: have_trait, False: 1 - have_trait}
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,372 @@
+import multiprocessing
+import numpy as np
+import os
+import sys
+
+from heredity import load_data, probability_arrays, trait_distribution
+
+# Sampling methods
+METHODS = ["weighting", "gibbs"]
+
+# Samples drawn in total, and how many each process draws at a time
+SAMPLES = 100000
+BATCH_SIZE = 10000
+
+# Gibbs sampling runs this many chains per process, and discards this
+# many sweeps of each chain before counting
+CHAINS = 100
+BURN_IN = 100
+
+# Gene counts of a couple, as (mother, father) axes of a 3 x 3 array
+MOTHER_GENES = np.arange(3).reshape(1, 3, 1)
+FATHER_GENES = np.arange(3).reshape(1, 1, 3)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python sampling.py data.csv [weighting|gibbs] [samples]")
+    people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) > 2 else "weighting"
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else SAMPLES
+    if method not in METHODS:
+        sys.exit(f"Method must be one of {', '.join(METHODS)}")
+
+    if method == "weighting":
+        probabilities, diagnostics = likelihood_weighting(people, samples)
+        print(f"Likelihood weighting: {samples} samples, "
+              f"effective sample size {diagnostics['ess']:.0f}")
+    else:
+        probabilities, diagnostics = gibbs_sampling(people, samples)
+        print(f"Gibbs sampling: {samples} samples, "
+              f"largest R-hat {diagnostics['rhat']:.4f}")
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+class Network():
+    """
+    The family's Bayesian network over genes, as arrays: people are
+    numbered in an order where parents come before their children.
+    """
+
+    def __init__(self, people):
+        self.names = topological_order(people)
+        index = {person: i for i, person in enumerate(self.names)}
+        n = len(self.names)
+
+        # Parents of each person, or -1 for founders
+        self.mother = np.array([
+            index.get(people[person]["mother"], -1) for person in self.names
+        ])
+        self.father = np.array([
+            index.get(people[person]["father"], -1) for person in self.names
+        ])
+
+        # Children of each person, with the index of the other parent
+        self.children = [[] for _ in range(n)]
+        for child in range(n):
+            if self.mother[child] >= 0:
+                m, f = self.mother[child], self.father[child]
+                self.children[m].append((child, f, True))
+                self.children[f].append((child, m, False))
+
+        # Probability tables from PROBS, also as logarithms
+        self.gene, trait, self.inheritance = probability_arrays()
+        self.log_gene = np.log(self.gene)
+        self.log_inheritance = np.log(self.inheritance)
+
+        # Log probabilities of the known trait (0 if unknown) given genes
+        self.log_evidence = np.zeros((n, 3))
+        for i, person in enumerate(self.names):
+            if people[person]["trait"] is not None:
+                self.log_evidence[i] = np.log(trait[:, int(people[person]["trait"])])
+
+        # Couples, each with the children they have together who have no
+        # children of their own, and with everyone else whose
+        # probability depends on the couple's genes
+        couples = dict()
+        for child in range(n):
+            if self.mother[child] >= 0:
+                couples.setdefault((self.mother[child], self.father[child]), [])
+                if not self.children[child]:
+                    couples[self.mother[child], self.father[child]].append(child)
+        self.couples = []
+        for (m, f), leaves in couples.items():
+            others = set([m, f])
+            others.update(child for child, _, _ in self.children[m] + self.children[f])
+            others.difference_update(leaves)
+            leaves = np.array(leaves, dtype=np.int64)
+            self.couples.append((m, f, leaves, sorted(others)))
+
+        # Log probability of the known traits of a couple's childless
+        # children given the couple's genes, with their genes summed out
+        self.log_leaves = [
+            np.log(self.inheritance @ np.exp(self.log_evidence[leaves].T)).sum(axis=2)
+            for _, _, leaves, _ in self.couples
+        ]
+
+        # People in no couple, neither parent nor child
+        self.single = [
+            i for i in range(n) if self.mother[i] < 0 and not self.children[i]
+        ]
+
+
+def topological_order(people):
+    """
+    Return the names of `people` ordered so that everyone comes after
+    their parents.
+    """
+    order = []
+    placed = set()
+    remaining = list(people)
+    while remaining:
+        waiting = []
+        for person in remaining:
+            parents = (people[person]["mother"], people[person]["father"])
+            if all(parent is None or parent in placed for parent in parents):
+                order.append(person)
+                placed.add(person)
+            else:
+                waiting.append(person)
+        if len(waiting) == len(remaining):
+            raise ValueError("family tree has a cycle")
+        remaining = waiting
+    return order
+
+
+def choose(rng, p):
+    """
+    Return one sample from each row of `p`, an array of probability
+    distributions over gene counts.
+    """
+    cumulative = np.cumsum(p, axis=1)
+    u = rng.random(len(p)) * cumulative[:, -1]
+    return (u[:, None] >= cumulative[:, :-1]).sum(axis=1)
+
+
+def run(function, jobs, processes=None):
+    """
+    Return the results of calling `function` with each tuple of
+    arguments in `jobs`, across `processes` worker processes (one per
+    CPU if None), or in this process if `processes` is 1.
+    """
+    if processes == 1:
+        return [function(*job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(function, jobs)
+
+
+def likelihood_weighting(people, samples=SAMPLES, processes=None, seed=None):
+    """
+    Estimate gene and trait probability distributions for each person by
+    likelihood weighting: genes are sampled from parents to children,
+    and each sample is weighted by the probability of the known traits.
+
+    Samples are drawn in batches across `processes` worker processes
+    (one per CPU if None), each with its own random stream derived from
+    `seed`. Return a tuple `(probabilities, diagnostics)`, where
+    `diagnostics["ess"]` is the effective sample size of the weights.
+    """
+    network = Network(people)
+    streams = processes or os.cpu_count()
+    jobs = [
+        (network, samples // streams + (k < samples % streams), sequence)
+        for k, sequence in enumerate(np.random.SeedSequence(seed).spawn(streams))
+    ]
+    results = run(weighted_totals, jobs, processes)
+
+    # Log weights are shifted per process; bring them to a common scale
+    shift = max(result[0] for result in results)
+    totals, weight, squares = 0, 0, 0
+    for result_shift, result_totals, result_weight, result_squares in results:
+        scale = np.exp(result_shift - shift)
+        totals = totals + scale * result_totals
+        weight += scale * result_weight
+        squares += scale ** 2 * result_squares
+
+    probabilities = distributions(people, network, totals / weight)
+    return probabilities, {"ess": float(weight ** 2 / squares)}
+
+
+def weighted_totals(network, samples, sequence):
+    """
+    Draw `samples` likelihood-weighted samples from `network` using the
+    random stream `sequence`, BATCH_SIZE at a time.
+
+    Return a tuple `(shift, totals, weight, squares)`: all weights are
+    divided by exp(shift) to stay in range, `totals[i, g]` is the total
+    weight of samples where person i has g genes, and `weight` and
+    `squares` are the sums of the weights and of their squares.
+    """
+    rng = np.random.default_rng(sequence)
+    n = len(network.names)
+    shift = -np.inf
+    totals = np.zeros((n, 3))
+    weight = squares = 0
+    for start in range(0, samples, BATCH_SIZE):
+        size = min(BATCH_SIZE, samples - start)
+        genes = np.zeros((size, n), dtype=np.int64)
+        log_weights = np.zeros(size)
+        for i in range(n):
+            if network.mother[i] < 0:
+                p = np.broadcast_to(network.gene, (size, 3))
+            else:
+                p = network.inheritance[
+                    genes[:, network.mother[i]], genes[:, network.father[i]]
+                ]
+            genes[:, i] = choose(rng, p)
+            log_weights += network.log_evidence[i, genes[:, i]]
+
+        # Rescale what was added so far if the largest weight grew
+        new_shift = max(shift, log_weights.max())
+        scale = np.exp(shift - new_shift)
+        totals *= scale
+        weight *= scale
+        squares *= scale ** 2
+        shift = new_shift
+
+        weights = np.exp(log_weights - shift)
+        for i in range(n):
+            totals[i] += np.bincount(genes[:, i], weights, minlength=3)
+        weight += weights.sum()
+        squares += (weights ** 2).sum()
+    return shift, totals, weight, squares
+
+
+def gibbs_sampling(people, samples=SAMPLES, chains=CHAINS, burn_in=BURN_IN,
+                   processes=None, seed=None):
+    """
+    Estimate gene and trait probability distributions for each person by
+    Gibbs sampling: each sweep resamples every person's genes given
+    everyone else's, and `samples` sweeps are counted in total after
+    `burn_in` sweeps of each chain are discarded.
+
+    People are resampled a couple at a time (see `chain_counts`), so
+    the genes of both parents can change together. Chains start from
+    genes drawn uniformly, far apart, so that chains settling in
+    different modes show up in the Gelman-Rubin statistic.
+
+    Every worker process (one per CPU if `processes` is None) advances
+    `chains` chains side by side as arrays. Return a tuple
+    `(probabilities, diagnostics)`, where `diagnostics["rhat"]` is the
+    largest Gelman-Rubin statistic over all people and gene counts;
+    values close to 1 mean the chains agree.
+    """
+    network = Network(people)
+    streams = processes or os.cpu_count()
+    sweeps = max(1, -(-samples // (streams * chains)))
+    jobs = [
+        (network, chains, burn_in, sweeps, sequence)
+        for sequence in np.random.SeedSequence(seed).spawn(streams)
+    ]
+    counts = np.concatenate(run(chain_counts, jobs, processes))
+
+    # Gelman-Rubin statistic of each gene count indicator
+    means = counts / sweeps
+    within = (means * (1 - means)).mean(axis=0) * sweeps / max(sweeps - 1, 1)
+    between = sweeps * means.var(axis=0, ddof=1) if len(means) > 1 else 0
+    pooled = (sweeps - 1) / sweeps * within + between / sweeps
+    mixed = within > 0
+    rhat = np.sqrt(pooled[mixed] / within[mixed]).max() if mixed.any() else 1.0
+
+    probabilities = distributions(people, network, means.mean(axis=0))
+    return probabilities, {"rhat": float(rhat)}
+
+
+def chain_counts(network, chains, burn_in, sweeps, sequence):
+    """
+    Run `chains` Gibbs chains on `network` using the random stream
+    `sequence`, and return an array where `counts[c, i, g]` is the number
+    of sweeps after burn-in in which person i had g genes in chain c.
+
+    Each sweep resamples every couple's genes together given everyone
+    else's, with the genes of their childless children summed out, and
+    then those children's genes given their parents'. People in no
+    couple are resampled on their own.
+    """
+    rng = np.random.default_rng(sequence)
+    n = len(network.names)
+    rows = np.arange(chains)
+
+    # Start from genes drawn uniformly
+    genes = rng.integers(3, size=(chains, n))
+
+    counts = np.zeros((chains, n, 3), dtype=np.int64)
+    for sweep in range(burn_in + sweeps):
+        for (m, f, leaves, others), log_leaves in zip(network.couples, network.log_leaves):
+
+            # Probability of each pair of gene counts of the couple
+            log_p = np.broadcast_to(log_leaves, (chains, 3, 3)).copy()
+            log_p += network.log_evidence[m][None, :, None]
+            log_p += network.log_evidence[f][None, None, :]
+            for i in others:
+                log_p += log_factor(network, genes, i, m, f)
+
+            p = np.exp(log_p - log_p.max(axis=(1, 2), keepdims=True))
+            pair = choose(rng, p.reshape(chains, 9))
+            genes[:, m], genes[:, f] = pair // 3, pair % 3
+
+            # Childless children given their parents' genes
+            if len(leaves):
+                p = (network.inheritance[genes[:, m], genes[:, f]][:, None, :]
+                     * np.exp(network.log_evidence[leaves])[None])
+                genes[:, leaves] = choose(rng, p.reshape(-1, 3)).reshape(chains, -1)
+
+        for i in network.single:
+            log_p = network.log_gene + network.log_evidence[i]
+            p = np.broadcast_to(np.exp(log_p - log_p.max()), (chains, 3))
+            genes[:, i] = choose(rng, p)
+
+        if sweep >= burn_in:
+            counts[rows[:, None], np.arange(n), genes] += 1
+    return counts
+
+
+def log_factor(network, genes, i, m, f):
+    """
+    Return the log probability of person i's genes given their parents'
+    in each chain, as an array over the gene counts of the couple `m`
+    and `f` (which may include person i or their parents), with the
+    genes of everyone else taken from `genes`.
+    """
+    def value(person):
+        if person == m:
+            return MOTHER_GENES
+        if person == f:
+            return FATHER_GENES
+        return genes[:, person].reshape(-1, 1, 1)
+
+    if network.mother[i] < 0:
+        return network.log_gene[value(i)]
+    return network.log_inheritance[
+        value(network.mother[i]), value(network.father[i]), value(i)
+    ]
+
+
+def distributions(people, network, gene):
+    """
+    Return probability distributions for each person in the format of
+    `heredity.enumerate_probabilities`, from the array `gene` where
+    `gene[i, g]` is the probability that person i has g genes.
+    """
+    probabilities = dict()
+    for i, person in enumerate(network.names):
+        genes = {g: gene[i, g].item() for g in (2, 1, 0)}
+        probabilities[person] = {
+            "gene": genes,
+            "trait": trait_distribution(genes, people[person]["trait"])
+        }
+    return {person: probabilities[person] for person in people}
+
+
+if __name__ == "__main__":
+    main()
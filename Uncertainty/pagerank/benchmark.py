@@ -0,0 +1,99 @@
+import os
+import sys
+import tempfile
+import time
+
+from generate import generate_graph, page_names, write_corpus
+from graph import save_graph
+from pagerank import (
+    DAMPING, METHODS, crawl, iterate_graph_pagerank, link_matrix, residual,
+    sample_graph_pagerank, solve, transition_matrix
+)
+
+# Bundled corpora, and number of pages of the synthetic graphs
+CORPORA = ["corpus0", "corpus1", "corpus2"]
+SIZES = [1000, 10000, 100000, 1000000]
+
+# Largest graph written out as HTML files to time crawling
+CRAWL_LIMIT = 100000
+
+# Random walk steps sampled per page
+SAMPLES_PER_PAGE = 10
+
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+SEED = 0
+
+
+def main():
+    if len(sys.argv) == 1:
+        sizes = SIZES
+    else:
+        sizes = [int(arg) for arg in sys.argv[1:]]
+
+    # Bundled corpora, if run from the project directory
+    for directory in CORPORA:
+        if os.path.isdir(directory):
+            pages, matrix, dangling = transition_matrix(crawl(directory, cache=False))
+            print(f"{directory}: {matrix.shape[0]} pages, {matrix.nnz} links")
+            compare_methods(matrix, dangling)
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            benchmark(size, directory)
+
+
+def benchmark(N, directory):
+    """
+    Generate a synthetic graph of N pages in `directory`, and print how
+    long it takes to generate, crawl (up to CRAWL_LIMIT pages), sample
+    and iterate, followed by a comparison of the iterative METHODS.
+    """
+    start = time.perf_counter()
+    offsets, targets = generate_graph(N, seed=SEED)
+    pages = page_names(N)
+    timings = {"generate": time.perf_counter() - start}
+    print(f"Synthetic graph: {N} pages, {len(targets)} links")
+
+    if N <= CRAWL_LIMIT:
+        corpus = os.path.join(directory, "corpus")
+        write_corpus(corpus, pages, offsets, targets)
+        start = time.perf_counter()
+        crawl(corpus, cache=False)
+        timings["crawl"] = time.perf_counter() - start
+
+    graph = os.path.join(directory, "graph")
+    save_graph(graph, pages, offsets, targets)
+
+    start = time.perf_counter()
+    sample_graph_pagerank(graph, DAMPING, SAMPLES_PER_PAGE * N)
+    timings["sample"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    iterate_graph_pagerank(graph, DAMPING)
+    timings["iterate"] = time.perf_counter() - start
+
+    for stage, elapsed in timings.items():
+        print(f"  {stage:>12}: {elapsed:8.3f}s")
+    compare_methods(*link_matrix(offsets, targets))
+
+
+def compare_methods(matrix, dangling):
+    """
+    Solve for PageRank with each of METHODS, and print the number of
+    iterations, the time taken and the residual of the result.
+    """
+    for method in METHODS:
+        start = time.perf_counter()
+        pagerank, iterations = solve(
+            matrix, dangling, DAMPING, TOLERANCE, MAX_ITERATIONS, method=method
+        )
+        elapsed = time.perf_counter() - start
+        error = residual(matrix, dangling, DAMPING, pagerank)
+        print(f"  {method:>12}: {elapsed:8.3f}s, {iterations:4} iterations, "
+              f"residual {error:.2e}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
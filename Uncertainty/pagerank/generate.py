@@ -0,0 +1,106 @@
+import numpy as np
+import os
+import sys
+
+from graph import save_graph
+
+# Mean number of links per page, and share of pages without links
+MEAN_LINKS = 8
+DANGLING = 0.1
+
+# Exponents of the power laws followed by the number of links of a page,
+# and by how often pages are linked to (higher is more skewed)
+OUT_DEGREE_EXPONENT = 2.7
+POPULARITY = 2.0
+
+FORMATS = ["graph", "html"]
+
+
+def main():
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python generate.py pages directory [graph|html] [seed]")
+    N = int(sys.argv[1])
+    directory = sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) > 3 else "graph"
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    if output not in FORMATS:
+        sys.exit(f"Format must be one of {', '.join(FORMATS)}")
+
+    offsets, targets = generate_graph(N, seed=seed)
+    if output == "graph":
+        save_graph(directory, page_names(N), offsets, targets)
+    else:
+        write_corpus(directory, page_names(N), offsets, targets)
+    print(f"Generated {N} pages with {len(targets)} links in {directory}")
+
+
+def generate_graph(N, mean_links=MEAN_LINKS, dangling=DANGLING, seed=None):
+    """
+    Return `(offsets, targets)` link arrays (see `graph.save_graph`) of a
+    random web-like graph of N pages.
+
+    The number of links of a page follows a power law with mean about
+    `mean_links`, and a `dangling` share of pages has none. Targets are
+    drawn from a skewed popularity distribution, so a few pages get most
+    links. Like a crawled corpus, no page links to itself or to the same
+    page twice, and each page's targets are sorted.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Power-law out-degrees, scaled to the requested mean
+    num_links = rng.zipf(OUT_DEGREE_EXPONENT, N).astype(np.float64)
+    num_links *= mean_links / ((1 - dangling) * num_links.mean())
+    num_links = np.minimum(np.rint(num_links), N - 1).astype(np.int64)
+    num_links[rng.random(N) < dangling] = 0
+
+    # Popular pages are spread over the ID range at random
+    sources = np.repeat(np.arange(N, dtype=np.int64), num_links)
+    popularity = rng.permutation(N)
+    targets = popularity[
+        (N * rng.random(len(sources)) ** POPULARITY).astype(np.int64)
+    ]
+
+    # Drop self-links and duplicates; sorting by (source, target)
+    # also groups the links by page
+    keep = sources != targets
+    links = np.unique(sources[keep] * N + targets[keep])
+    sources, targets = np.divmod(links, N)
+
+    offsets = np.zeros(N + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=N), out=offsets[1:])
+    dtype = np.int32 if N < 2 ** 31 else np.int64
+    return offsets, targets.astype(dtype)
+
+
+def page_names(N):
+    """
+    Return names for N pages, zero-padded so that sorting them keeps
+    them in order of page ID.
+    """
+    width = len(str(max(N - 1, 0)))
+    return [f"{i:0{width}}.html" for i in range(N)]
+
+
+def write_corpus(directory, pages, offsets, targets):
+    """
+    Write the graph given by link arrays as a directory of HTML files
+    that `pagerank.crawl` reads back as the same graph.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i, page in enumerate(pages):
+        links = targets[offsets[i]:offsets[i + 1]].tolist()
+        name = os.path.splitext(page)[0]
+        with open(os.path.join(directory, page), "w") as f:
+            f.write("<!DOCTYPE html>\n<html lang=\"en\">\n    <head>\n")
+            f.write(f"        <title>{name}</title>\n    </head>\n    <body>\n")
+            f.write(f"        <h1>{name}</h1>\n\n")
+            f.write("        <div>Links:</div>\n        <ul>\n")
+            for link in links:
+                target = pages[link]
+                f.write(f"            <li><a href=\"{target}\">"
+                        f"{os.path.splitext(target)[0]}</a></li>\n")
+            f.write("        </ul>\n    </body>\n</html>\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import numpy as np
+import os
+
+# Files making up a graph directory
+OFFSETS = "offsets.npy"
+TARGETS = "targets.npy"
+NAMES = "pages.txt"
+
+# Number of links handled at a time when multiplying by a LinkMatrix
+BLOCK_SIZE = 1 << 22
+
+
+def save_graph(directory, pages, offsets, targets):
+    """
+    Save a link graph to `directory`.
+
+    Pages are referred to by integer IDs: page `pages[i]` has ID i, and
+    links to the pages with IDs `targets[offsets[i]:offsets[i + 1]]`.
+    The arrays are saved as .npy files so they can be memory-mapped,
+    and the page names as a separate text file, one name per line.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # Page IDs fit in 32 bits for all but the largest graphs
+    dtype = np.int32 if len(pages) < 2 ** 31 else np.int64
+    np.save(os.path.join(directory, OFFSETS), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(directory, TARGETS), np.asarray(targets, dtype=dtype))
+    with open(os.path.join(directory, NAMES), "w") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+
+def load_graph(directory):
+    """
+    Return a tuple `(offsets, targets)` with the link arrays of the graph
+    saved in `directory`, memory-mapped rather than read into memory.
+    """
+    offsets = np.load(os.path.join(directory, OFFSETS), mmap_mode="r")
+    targets = np.load(os.path.join(directory, TARGETS), mmap_mode="r")
+    return offsets, targets
+
+
+def load_names(directory):
+    """
+    Return the list of page names of the graph saved in `directory`,
+    in order of page ID.
+    """
+    with open(os.path.join(directory, NAMES)) as f:
+        return f.read().splitlines()
+
+
+def is_graph(directory):
+    """
+    Return True if `directory` holds a graph saved by `save_graph`.
+    """
+    return all(
+        os.path.exists(os.path.join(directory, filename))
+        for filename in [OFFSETS, TARGETS, NAMES]
+    )
+
+
+class LinkMatrix():
+    """
+    PageRank transition matrix of a link graph given by (possibly
+    memory-mapped) `offsets` and `targets` arrays, without building
+    the matrix in memory.
+
+    `matrix @ pagerank` is the rank each page receives through links
+    when every page shares its rank evenly between its links, like the
+    matrix returned by `pagerank.transition_matrix`.
+    """
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+        self.num_links = np.diff(offsets)
+        self.shape = (len(self.num_links), len(self.num_links))
+
+    def __matmul__(self, pagerank):
+        N = self.shape[0]
+        share = pagerank / np.maximum(self.num_links, 1)
+        result = np.zeros(N)
+
+        # Go through the links in blocks of whole pages
+        start = 0
+        while start < N:
+            end = int(np.searchsorted(
+                self.offsets, self.offsets[start] + BLOCK_SIZE, side="right"
+            )) - 1
+            end = min(max(end, start + 1), N)
+            first, last = self.offsets[start], self.offsets[end]
+            result += np.bincount(
+                self.targets[first:last],
+                weights=np.repeat(share[start:end], self.num_links[start:end]),
+                minlength=N
+            )
+            start = end
+
+        return result
@@ -1,42 +1,136 @@
+import math
+import multiprocessing
+import numpy as np
 import os
-import random
 import re
+import scipy.sparse
+import scipy.sparse.linalg
+import scipy.stats
 import sys
 
+from graph import NAMES, LinkMatrix, is_graph, load_graph, load_names, save_graph
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Links in HTML files, which are read this many characters at a time
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+CHUNK_SIZE = 65536
+
+# Names of the link graph saved by `crawl` in a corpus directory,
+# and of the PageRank values saved by `incremental_pagerank`
+GRAPH = ".graph"
+RANKS = ".ranks.npz"
+
+# Iteration stops once PageRank values change by less than this in total
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
+
+# Iterative solvers, and how often quadratic extrapolation is applied
+METHODS = ["jacobi", "gauss-seidel", "quadratic"]
+EXTRAPOLATION_PERIOD = 10
+
+# Sampling runs up to this many walkers side by side, each taking at
+# least MIN_WALK_LENGTH steps after BURN_IN steps that are not counted
+WALKERS = 1000
+MIN_WALK_LENGTH = 100
+BURN_IN = 50
+
+# Visited pages are buffered and counted this many at a time
+COUNT_BUFFER = 1000000
+
+# Parallel sampling merges the walks this many times, and stops early once
+# the 95% confidence intervals of all pages add up to less than tolerance.
+# Intervals are estimated from batches of walkers, each process splitting
+# its walkers into up to BATCHES groups every round
+ROUNDS = 20
+SAMPLING_TOLERANCE = 0.01
+CONFIDENCE = 0.95
+BATCHES = 10
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    args = [arg for arg in sys.argv[1:] if arg != "--incremental"]
+    incremental = len(args) < len(sys.argv) - 1
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python pagerank.py corpus [processes] [--incremental]")
+
+    # A saved graph is ranked without building a corpus dictionary
+    if is_graph(args[0]):
+        ranks = sample_graph_pagerank(args[0], DAMPING, SAMPLES)
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        ranks = iterate_graph_pagerank(args[0], DAMPING)
+        print(f"PageRank Results from Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
+    # Iterate first, so changes are measured against the previous run
+    if incremental:
+        iterated, changes, iterations = incremental_pagerank(args[0], DAMPING)
+    corpus = crawl(args[0])
+
+    if len(args) == 2:
+        processes = int(args[1])
+        print(f"Sampling with {processes} processes")
+        ranks, samples = parallel_sample_pagerank(corpus, DAMPING, SAMPLES, processes)
+    else:
+        ranks, samples = sample_pagerank(corpus, DAMPING, SAMPLES), SAMPLES
+    print(f"PageRank Results from Sampling (n = {samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if incremental:
+        ranks = iterated
+    else:
+        ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
+    if incremental:
+        print(f"  ({len(changes['added'])} pages added, "
+              f"{len(changes['removed'])} removed, "
+              f"{len(changes['changed'])} changed since last run; "
+              f"{iterations} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, processes=None, cache=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Files are parsed in parallel by `processes` worker processes (one per
+    CPU if None). If `cache` is True, the resulting link graph is saved
+    in the directory (see `graph.save_graph`) if it can be written, and
+    reused as long as no HTML file has changed.
     """
-    pages = dict()
+    path = os.path.join(directory, GRAPH)
+
+    # Find all HTML files, and when they were last modified
+    filenames = []
+    modified = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".html") and entry.is_file():
+            filenames.append(entry.name)
+            modified = max(modified, entry.stat().st_mtime)
+    filenames.sort()
+
+    if (cache and is_graph(path)
+            and os.path.getmtime(os.path.join(path, NAMES)) >= modified):
+        pages = load_corpus(path)
+        if sorted(pages) == filenames:
+            return pages
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    paths = [os.path.join(directory, filename) for filename in filenames]
+    with multiprocessing.Pool(processes) as pool:
+        links = pool.map(extract_links, paths)
+    pages = {
+        filename: file_links - {filename}
+        for filename, file_links in zip(filenames, links)
+    }
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -44,11 +138,57 @@ def crawl(directory):
             link for link in pages[filename]
             if link in pages
         )
-    
+
+    # The cache only saves time, so a directory that cannot be written
+    # to is crawled again next time
+    if cache:
+        try:
+            save_graph(path, *link_arrays(pages))
+        except OSError:
+            pass
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+def extract_links(path):
+    """
+    Return the set of pages linked to by the HTML file at `path`.
+
+    The file is read CHUNK_SIZE characters at a time. Anything from the
+    last "<" of a chunk onwards may be a tag cut in two, so it is only
+    searched once the next chunk has been read.
+    """
+    links = set()
+    with open(path) as f:
+        rest = ""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            contents = rest + chunk
+            if not chunk:
+                break
+            cut = contents.rfind("<")
+            if cut < 0:
+                cut = len(contents)
+            links.update(LINK.findall(contents, 0, cut))
+            rest = contents[cut:]
+        links.update(LINK.findall(contents))
+    return links
+
+
+def load_corpus(directory):
+    """
+    Load the graph saved in `directory` as a corpus dictionary.
+    """
+    pages = load_names(directory)
+    offsets, targets = load_graph(directory)
+    offsets = offsets.tolist()
+    targets = targets.tolist()
+    return {
+        page: set(pages[target] for target in targets[offsets[i]:offsets[i + 1]])
+        for i, page in enumerate(pages)
+    }
+
+
+def transition_model(corpus, page, damping_factor, teleport=None):
     """
     Return a probability distribution over which page to visit next,
     given a current page.
@@ -56,11 +196,16 @@ def transition_model(corpus, page, damping_factor):
     With probability `damping_factor`, choose a link at random
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
+
+    If `teleport` is given (see `teleport_vector`), jumps that are not
+    made through a link land on pages according to `teleport` instead
+    of uniformly.
     """
     trans_mod = dict()
 
-    # Number of page
-    N = len(corpus)
+    # Probability of jumping to each page
+    pages = list(corpus)
+    jump = dict(zip(pages, teleport_vector(pages, teleport).tolist()))
 
     # Number of links of the current page
     num_links = len(corpus[page])
@@ -71,17 +216,37 @@ def transition_model(corpus, page, damping_factor):
     if num_links != 0:    #check if current page has links
         for cor in corpus:
             if cor == page:
-                trans_mod[cor] = (1-damping_factor)/N
+                trans_mod[cor] = (1-damping_factor)*jump[cor]
             elif cor not in corpus[page]:
-                trans_mod[cor] = (1-damping_factor)/N
+                trans_mod[cor] = (1-damping_factor)*jump[cor]
             else:
-                trans_mod[cor] = (1-damping_factor)/N + damping_factor/num_links
+                trans_mod[cor] = (1-damping_factor)*jump[cor] + damping_factor/num_links
     else:   #check if current page has no link
         for cor in corpus:
-            trans_mod[cor] = 1/N
+            trans_mod[cor] = jump[cor]
 
     return trans_mod
 
+
+def teleport_vector(pages, teleport=None):
+    """
+    Return an array with the probability of jumping to each of `pages`.
+
+    `teleport` may be None (jump uniformly to any page), a dictionary
+    mapping pages to non-negative weights, or any other collection of
+    pages (jump uniformly to one of them, e.g. the pages on a topic).
+    Weights are normalized to sum to 1; pages left out get 0.
+    """
+    if teleport is None:
+        return np.full(len(pages), 1 / len(pages))
+    if not isinstance(teleport, dict):
+        teleport = {page: 1 for page in teleport}
+    vector = np.array([teleport.get(page, 0) for page in pages], dtype=float)
+    if vector.sum() <= 0:
+        raise ValueError("teleport must give some page a positive weight")
+    return vector / vector.sum()
+
+
 def sample_pagerank(corpus, damping_factor, n):
     """
     Return PageRank values for each page by sampling `n` pages
@@ -91,27 +256,285 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pagerank = dict()
+    pages, offsets, targets = link_arrays(corpus)
+    walkers = max(1, min(WALKERS, n // MIN_WALK_LENGTH))
+    counts = walk(offsets, targets, damping_factor, n, walkers)
 
-    for cor in corpus:
-        pagerank[cor] = 0
+    #Normalizing so that the results sum to 1
+    pagerank = counts / counts.sum()
 
-    cur_page = random.choice(list(corpus.keys()))
-    trans_model = transition_model(corpus, cur_page, damping_factor)
-    pagerank[cur_page] += 1
+    return dict(zip(pages, pagerank.tolist()))
 
-    for _ in range(1, n):
-        cur_page = random.choices(list(trans_model.keys()), list(trans_model.values()))[0]
-        pagerank[cur_page] += 1
-        trans_model = transition_model(corpus, cur_page, damping_factor)
+
+def sample_graph_pagerank(directory, damping_factor, n):
+    """
+    Return PageRank values for each page of the graph saved in
+    `directory` by sampling `n` pages, like `sample_pagerank`, walking
+    the memory-mapped link arrays directly.
+    """
+    offsets, targets = load_graph(directory)
+    walkers = max(1, min(WALKERS, n // MIN_WALK_LENGTH))
+    counts = walk(offsets, targets, damping_factor, n, walkers)
 
     #Normalizing so that the results sum to 1
-    norm_opt = 1/sum(pagerank.values())
-    pagerank.update((x, y*norm_opt) for x, y in pagerank.items())
+    pagerank = counts / counts.sum()
+
+    return dict(zip(load_names(directory), pagerank.tolist()))
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, processes=None,
+                             tolerance=SAMPLING_TOLERANCE, seed=None, report=True):
+    """
+    Return a tuple `(pagerank, samples)` with PageRank values for each
+    page, as a dictionary like `sample_pagerank`, and the number of
+    pages sampled: up to `n`, with independent walks spread over
+    `processes` worker processes (one per CPU if None).
+
+    Each process runs its own stream of walks, seeded from `seed`
+    so that no two streams share random numbers. Visit counts are
+    merged ROUNDS times; after each round, the 95% confidence interval
+    of every page is estimated from the spread between independent
+    batches of walkers (see `worker_walk`), using the Student t
+    distribution for the number of batches so far, so the estimate
+    does not depend on the number of processes. The half-widths add up
+    to a bound on the L1 error of the estimate, and sampling stops
+    early once it drops below `tolerance`. If `report`
+    is True, the number of samples, the error bound, the widest interval
+    and the L1 distance to the iterative PageRank are printed after
+    every round.
+    """
+    pages, offsets, targets = link_arrays(corpus)
+    N = len(pages)
+    streams = processes or os.cpu_count()
+    if report:
+        reference = np.array([
+            value for _, value in sorted(
+                iterate_pagerank(corpus, damping_factor, tolerance=1e-10).items()
+            )
+        ])
+
+    per_round = max(1, -(-n // (streams * ROUNDS)))
+    walkers = max(1, min(WALKERS, per_round // MIN_WALK_LENGTH))
+    batches = min(BATCHES, walkers)
+    seeds = np.random.SeedSequence(seed)
+    sampled = 0
+
+    # Sums over all batches so far of their visit counts, of the squares
+    # of the counts, of the counts times the batch size, and of the
+    # squares of the batch sizes
+    counts = np.zeros(N)
+    squares = np.zeros(N)
+    products = np.zeros(N)
+    size_squares = 0
+    num_batches = 0
+
+    with multiprocessing.Pool(
+        streams, initializer=set_worker_graph, initargs=(offsets, targets)
+    ) as pool:
+        while sampled < n:
+
+            # Every stream gets a fresh child seed for each round
+            size = min(per_round, -(-(n - sampled) // streams))
+            jobs = [
+                (damping_factor, size, walkers, batches, child)
+                for child in seeds.spawn(streams)
+            ]
+            for result in pool.starmap(worker_walk, jobs):
+                counts += result[0]
+                squares += result[1]
+                products += result[2]
+                size_squares += result[3]
+                num_batches += result[4]
+            sampled += size * streams
+
+            # Variance of the ratio of total visits to total samples,
+            # from the deviations of each batch from the current estimate
+            pagerank = counts / counts.sum()
+            half_widths = np.full(N, math.inf)
+            if num_batches > 1:
+                deviations = np.maximum(
+                    squares - 2 * pagerank * products + pagerank ** 2 * size_squares, 0
+                )
+                variance = (deviations * num_batches
+                            / ((num_batches - 1) * counts.sum() ** 2))
+                t = scipy.stats.t.ppf((1 + CONFIDENCE) / 2, num_batches - 1)
+                half_widths = t * np.sqrt(variance)
+            error = half_widths.sum()
+            if report:
+                distance = np.abs(pagerank - reference).sum()
+                print(f"  {sampled} samples: error bound {error:.5f}, "
+                      f"widest 95% CI +/- {half_widths.max():.5f}, "
+                      f"L1 distance {distance:.5f}")
+            if error < tolerance:
+                break
+
+    return dict(zip(pages, pagerank.tolist())), sampled
+
+
+# Link graph of the worker process, see `set_worker_graph`
+worker_graph = None
+
+
+def set_worker_graph(offsets, targets):
+    """
+    Store the link graph in a worker process once, instead of
+    sending it along with every job.
+    """
+    global worker_graph
+    worker_graph = (offsets, targets)
+
+
+def worker_walk(damping_factor, n, walkers, batches, seed):
+    """
+    Run `walk` on the worker's link graph, with random numbers
+    drawn from the seed sequence `seed`, and the walkers split into
+    `batches` independent groups.
+
+    Return a tuple `(counts, squares, products, size_squares, batches)`
+    summing over the groups their visit counts, the squares of the
+    counts, the counts times the group's number of samples, and the
+    squares of the numbers of samples.
+    """
+    offsets, targets = worker_graph
+    rng = np.random.default_rng(seed)
+    counts = walk(offsets, targets, damping_factor, n, walkers, rng, batches)
+    counts = counts.astype(float)
+    sizes = counts.sum(axis=1)
+    return (counts.sum(axis=0), (counts ** 2).sum(axis=0), sizes @ counts,
+            (sizes ** 2).sum(), batches)
+
+
+def walk(offsets, targets, damping_factor, n, walkers, rng=None, batches=None):
+    """
+    Sample `n` pages by random walks on the link graph given by
+    `offsets` and `targets` (see `link_arrays`), and return an array
+    with the number of times each page was visited.
+
+    `walkers` independent walks, each starting on a page at random,
+    take their steps side by side so every step is a handful of array
+    operations (see `step`). Walks are short, so their first BURN_IN
+    steps are not counted: the page a walk starts on still weighs on
+    where it is after k steps by about `damping_factor ** k`, which
+    would otherwise bias the counts towards uniform.
+
+    If `batches` is given, the walkers are split into that many groups,
+    and an array of shape (batches, N) with the visit counts of each
+    group is returned instead.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    N = len(offsets) - 1
+    num_links = np.diff(offsets)
+    counts = np.zeros(N * (batches or 1), dtype=np.int64)
+
+    # Pages visited by walkers of group g are counted at g * N + page
+    if batches is not None:
+        group = np.arange(walkers) % batches * N
+
+    # Pages visited by every walker over the last few steps
+    steps = max(1, COUNT_BUFFER // walkers)
+    visited = np.empty((steps, walkers), dtype=np.int64)
+
+    page = rng.integers(N, size=walkers)
+    for _ in range(BURN_IN):
+        page = step(offsets, targets, num_links, damping_factor, page, rng)
+
+    sampled = 0
+    while sampled < n:
+        size = min(steps, -(-(n - sampled) // walkers))
+        for k in range(size):
+            visited[k] = page
+            page = step(offsets, targets, num_links, damping_factor, page, rng)
+
+        # The last step may only need some of the walkers
+        batch = visited[:size]
+        if batches is not None:
+            batch = batch + group
+        batch = batch.ravel()[:n - sampled]
+        counts += np.bincount(batch, minlength=len(counts))
+        sampled += len(batch)
+
+    if batches is not None:
+        return counts.reshape(batches, N)
+    return counts
+
+
+def step(offsets, targets, num_links, damping_factor, page, rng):
+    """
+    Return the next page of walkers currently on the pages in the
+    array `page`. Each walker follows one of its page's links at random
+    with probability `damping_factor`, and otherwise (or if its page has
+    no links) jumps to a page at random. Links are picked uniformly, so
+    choosing one is just indexing the page's slice of `targets` with a
+    scaled random number.
+    """
+    walkers = len(page)
+    follow = (rng.random(walkers) < damping_factor) & (num_links[page] > 0)
+    link = offsets[page] + (rng.random(walkers) * num_links[page]).astype(np.int64)
+    next_page = rng.integers(len(num_links), size=walkers)
+    next_page[follow] = targets[link[follow]]
+    return next_page
+
+
+def link_arrays(corpus):
+    """
+    Return a tuple `(pages, offsets, targets)` describing the links
+    in `corpus` as arrays.
+
+    `pages` is a sorted list of page names; page `pages[i]` is
+    referred to by its index i. The pages linked to by page i are
+    `targets[offsets[i]:offsets[i + 1]]`.
+    """
+    pages = sorted(corpus)
+    ids = {page: i for i, page in enumerate(pages)}
+
+    num_links = np.fromiter((len(corpus[page]) for page in pages), dtype=np.int64)
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(num_links, out=offsets[1:])
+    targets = np.fromiter(
+        (ids[link] for page in pages for link in corpus[page]),
+        dtype=np.int64, count=offsets[-1]
+    )
+
+    return pages, offsets, targets
 
-    return pagerank
 
-def iterate_pagerank(corpus, damping_factor):
+def transition_matrix(corpus):
+    """
+    Return a tuple `(pages, matrix, dangling)` describing the links
+    in `corpus` as arrays.
+
+    `pages` is a sorted list of page names; page `pages[i]` is
+    referred to by its index i. `matrix` is a sparse N x N matrix in
+    CSR format where `matrix[j, i]` is 1 / (number of links of page i)
+    if page i links to page j, and 0 otherwise. `dangling` is a boolean
+    array marking the pages with no links at all.
+    """
+    pages, offsets, targets = link_arrays(corpus)
+    return (pages, *link_matrix(offsets, targets))
+
+
+def link_matrix(offsets, targets):
+    """
+    Return a tuple `(matrix, dangling)` like `transition_matrix`, for
+    the graph given by link arrays `offsets` and `targets`.
+    """
+    N = len(offsets) - 1
+
+    # Row i of the transposed matrix holds the links of page i
+    num_links = np.diff(offsets)
+    weights = np.repeat(1 / np.maximum(num_links, 1), num_links)
+    matrix = scipy.sparse.csr_matrix(
+        (weights, targets, offsets), shape=(N, N)
+    ).T.tocsr()
+
+    return matrix, num_links == 0
+
+
+def iterate_pagerank(corpus, damping_factor,
+                     tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                     start=None, method="jacobi"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -119,51 +542,334 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Iteration stops once the PageRank values change by less than
+    `tolerance` in total (L1 distance), or after `max_iterations`.
+    If given, `start` is a dictionary of PageRank values (e.g. from
+    an earlier version of the corpus) to start iterating from.
+    `method` is one of METHODS (see `solve`).
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    pagerank, _ = solve(
+        matrix, dangling, damping_factor, tolerance, max_iterations,
+        start_vector(pages, start), method
+    )
+    return dict(zip(pages, pagerank.tolist()))
+
+
+def iterate_graph_pagerank(directory, damping_factor,
+                           tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page of the graph saved in
+    `directory` by iteration, like `iterate_pagerank`, streaming
+    through the memory-mapped link arrays at each iteration.
+    """
+    offsets, targets = load_graph(directory)
+    matrix = LinkMatrix(offsets, targets)
+    pagerank, _ = power_iteration(
+        matrix, matrix.num_links == 0, damping_factor, tolerance, max_iterations
+    )
+    return dict(zip(load_names(directory), pagerank.tolist()))
+
+
+def power_iteration(matrix, dangling, damping_factor,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    pagerank=None, teleport=None):
     """
-    pagerank = dict()
-    icorpus = dict()
-    pagerank_past = dict()
+    Iterate the PageRank update for the transition `matrix` and
+    `dangling` pages (see `transition_matrix`), starting from the
+    array `pagerank` (uniform if None).
+
+    `teleport` is the distribution of random jumps (uniform if None).
+    It may also be an N x K array of K distributions, one per column,
+    in which case the K PageRank vectors are computed together as the
+    columns of an N x K array.
 
+    Return a tuple `(pagerank, iterations)` with the normalized
+    PageRank array and the number of iterations run.
+    """
     # Number of page
-    N = len(corpus)
-
-    for cor in corpus:
-        temp = 1/len(corpus)
-        pagerank[cor] = temp
-        pagerank_past[cor] = temp
-        pages_link_to = set()
-        for k, v in corpus.items():
-            if cor in v:
-                pages_link_to.add(k)
-        icorpus.update({cor:pages_link_to})
-    
-    check = 0
-    while check < len(icorpus):
-        check = 0
-
-        for icor in icorpus:
-            temp = 0
-            if  len(icorpus[icor]) == 0:
-                temp = (1-damping_factor)/N
-            else:
-                temp = (1-damping_factor)/N
-                for i in icorpus[icor]:
-                    num_links_i = len(corpus[i])
-                    if num_links_i != 0:
-                        temp = temp + damping_factor*pagerank[i]/num_links_i
-                    else:
-                        temp = temp + damping_factor*pagerank[i]/N
-
-            if abs(temp-pagerank[icor]) < 0.001:
-                check+=1
-            
-            pagerank[icor] = temp
+    N = len(dangling)
+
+    if teleport is None:
+        teleport = np.full(N, 1 / N)
+    if pagerank is None:
+        pagerank = np.full(teleport.shape, 1 / N)
+
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+
+        # Pages with no links spread their rank like random jumps
+        new_pagerank = (
+            (1 - damping_factor) * teleport
+            + damping_factor * (matrix @ pagerank)
+            + damping_factor * pagerank[dangling].sum(axis=0) * teleport
+        )
+
+        change = np.abs(new_pagerank - pagerank).sum(axis=0).max()
+        pagerank = new_pagerank
+        if change < tolerance:
+            break
 
     #Normalizing so that the results sum to 1
-    norm_opt = 1/sum(pagerank.values())
-    pagerank.update((x, y*norm_opt) for x, y in pagerank.items())    
+    return pagerank / pagerank.sum(axis=0), iterations
+
+
+def solve(matrix, dangling, damping_factor,
+          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+          pagerank=None, method="jacobi"):
+    """
+    Compute PageRank for the transition `matrix` and `dangling` pages
+    with one of METHODS:
+
+    "jacobi": plain power iteration (see `power_iteration`).
+    "gauss-seidel": each sweep uses the ranks already updated in the
+    same sweep (see `gauss_seidel`).
+    "quadratic": power iteration with periodic quadratic extrapolation
+    (see `quadratic_extrapolation`).
+
+    Return a tuple `(pagerank, iterations)` like `power_iteration`.
+    """
+    if method == "jacobi":
+        solver = power_iteration
+    elif method == "gauss-seidel":
+        solver = gauss_seidel
+    elif method == "quadratic":
+        solver = quadratic_extrapolation
+    else:
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+    return solver(
+        matrix, dangling, damping_factor, tolerance, max_iterations, pagerank
+    )
+
+
+def gauss_seidel(matrix, dangling, damping_factor,
+                 tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                 pagerank=None):
+    """
+    Compute PageRank like `power_iteration`, but with Gauss-Seidel
+    sweeps: pages are updated in order, and each page's update already
+    uses the new ranks of the pages before it. A sweep is one sparse
+    triangular solve; the rank of dangling pages is taken from the
+    previous sweep, so each sweep is normalized to sum to 1 before it
+    is compared with the last. `matrix` must be a SciPy sparse matrix.
+    """
+    # Number of page
+    N = len(dangling)
+
+    if pagerank is None:
+        pagerank = np.full(N, 1 / N)
+
+    # Links to earlier pages (and self-links) use the new ranks,
+    # links to later pages the previous ones
+    lower = (
+        scipy.sparse.identity(N, format="csr")
+        - damping_factor * scipy.sparse.tril(matrix, format="csr")
+    ).tocsr()
+    upper = damping_factor * scipy.sparse.triu(matrix, k=1, format="csr")
+
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+
+        jump = (1 - damping_factor + damping_factor * pagerank[dangling].sum()) / N
+        new_pagerank = scipy.sparse.linalg.spsolve_triangular(
+            lower, jump + upper @ pagerank, lower=True
+        )
+        new_pagerank /= new_pagerank.sum()
+
+        change = np.abs(new_pagerank - pagerank).sum()
+        pagerank = new_pagerank
+        if change < tolerance:
+            break
+
+    #Normalizing so that the results sum to 1
+    return pagerank / pagerank.sum(), iterations
+
+
+def quadratic_extrapolation(matrix, dangling, damping_factor,
+                            tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                            pagerank=None):
+    """
+    Compute PageRank like `power_iteration`, but every
+    EXTRAPOLATION_PERIOD iterations replace the current ranks by a
+    quadratic extrapolation from the last four iterates, which removes
+    the two slowest-decaying error components (Kamvar et al., 2003).
+    """
+    # Number of page
+    N = len(dangling)
+
+    if pagerank is None:
+        pagerank = np.full(N, 1 / N)
+
+    iterates = [pagerank]
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+
+        new_pagerank = (
+            (1 - damping_factor) / N
+            + damping_factor * (matrix @ pagerank)
+            + damping_factor * pagerank[dangling].sum() / N
+        )
+
+        change = np.abs(new_pagerank - pagerank).sum()
+        pagerank = new_pagerank
+        if change < tolerance:
+            break
+
+        iterates = iterates[-3:] + [pagerank]
+        if len(iterates) == 4 and iterations % EXTRAPOLATION_PERIOD == 0:
+            pagerank = extrapolate(*iterates)
+            iterates = [pagerank]
+
+    #Normalizing so that the results sum to 1
+    return pagerank / pagerank.sum(), iterations
+
+
+def extrapolate(x0, x1, x2, x3):
+    """
+    Return the quadratic extrapolation of four successive iterates,
+    clipped to non-negative values and normalized to sum to 1.
+    """
+    # Least-squares fit of the differences for the polynomial coefficients
+    y = np.column_stack([x1 - x0, x2 - x0])
+    (g1, g2), *_ = np.linalg.lstsq(y, x0 - x3, rcond=None)
+    pagerank = (g1 + g2 + 1) * x1 + (g2 + 1) * x2 + x3
+    pagerank = np.maximum(pagerank, 0)
+    return pagerank / pagerank.sum()
+
+
+def residual(matrix, dangling, damping_factor, pagerank):
+    """
+    Return how much one more power iteration step would change the
+    PageRank array `pagerank`, in total (L1 distance).
+    """
+    N = len(dangling)
+    new_pagerank = (
+        (1 - damping_factor) / N
+        + damping_factor * (matrix @ pagerank)
+        + damping_factor * pagerank[dangling].sum() / N
+    )
+    return np.abs(new_pagerank - pagerank).sum()
+
+
+def personalized_pagerank(corpus, damping_factor, teleport,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return personalized PageRank values for each page, as a dictionary
+    like `iterate_pagerank`, where random jumps follow `teleport` (see
+    `teleport_vector`) instead of landing on any page uniformly.
+    """
+    return topic_pageranks(
+        corpus, damping_factor, {None: teleport}, tolerance, max_iterations
+    )[None]
 
-    return pagerank
+
+def topic_pageranks(corpus, damping_factor, teleports,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return personalized PageRank values for many teleport distributions
+    at once. `teleports` is a dictionary mapping a name (e.g. a topic)
+    to a teleport distribution (see `teleport_vector`).
+
+    All distributions are iterated together, one column each, so every
+    iteration is a single sparse matrix product. Return a dictionary
+    mapping each name to a dictionary of PageRank values.
+    """
+    pages, matrix, dangling = transition_matrix(corpus)
+    names = list(teleports)
+    teleport = np.column_stack([
+        teleport_vector(pages, teleports[name]) for name in names
+    ])
+    pagerank, _ = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations,
+        teleport=teleport
+    )
+    return {
+        name: dict(zip(pages, pagerank[:, k].tolist()))
+        for k, name in enumerate(names)
+    }
+
+
+def start_vector(pages, start):
+    """
+    Return an array of starting PageRank values for `pages`, taken from
+    the dictionary `start` where possible. Pages missing from `start`
+    get 1 / N, and the result is normalized to sum to 1.
+    Return None if `start` is None.
+    """
+    if start is None:
+        return None
+    N = len(pages)
+    pagerank = np.array([start.get(page, 1 / N) for page in pages])
+    return pagerank / pagerank.sum()
+
+
+def incremental_pagerank(directory, damping_factor,
+                         tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Crawl `directory` and return PageRank values for its pages by
+    iteration, warm-started from the values saved by the previous run
+    on the same directory (if any). The new values are saved in turn.
+
+    Return a tuple `(pagerank, changes, iterations)`, where `changes`
+    is the difference between the previous and the current link graph
+    as returned by `diff_corpus`, and `iterations` is the number of
+    iterations needed to converge.
+    """
+    cache = os.path.join(directory, GRAPH)
+    previous = load_corpus(cache) if is_graph(cache) else dict()
+    corpus = crawl(directory)
+    changes = diff_corpus(previous, corpus)
+
+    path = os.path.join(directory, RANKS)
+    start = load_ranks(path) if os.path.exists(path) else None
+
+    pages, matrix, dangling = transition_matrix(corpus)
+    pagerank, iterations = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations,
+        start_vector(pages, start)
+    )
+    pagerank = dict(zip(pages, pagerank.tolist()))
+    save_ranks(pagerank, path)
+
+    return pagerank, changes, iterations
+
+
+def diff_corpus(old, new):
+    """
+    Compare two corpora, and return a dictionary with the sets of pages
+    "added" to and "removed" from `old`, and of pages in both whose
+    links "changed".
+    """
+    return {
+        "added": set(new) - set(old),
+        "removed": set(old) - set(new),
+        "changed": set(
+            page for page in new
+            if page in old and old[page] != new[page]
+        )
+    }
+
+
+def save_ranks(pagerank, path):
+    """
+    Save the PageRank values in dictionary `pagerank` to `path`.
+    """
+    pages = sorted(pagerank)
+    with open(path, "wb") as f:
+        np.savez(f, pages=np.array(pages),
+                 ranks=np.array([pagerank[page] for page in pages]))
+
+
+def load_ranks(path):
+    """
+    Load PageRank values saved by `save_ranks` from `path`.
+    """
+    with np.load(path) as data:
+        return dict(zip(data["pages"].tolist(), data["ranks"].tolist()))
 
 
 if __name__ == "__main__":